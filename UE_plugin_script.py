@@ -1,6 +1,6 @@
 import unreal
 import os
-import time
+import json
 
 """
 Diese Werte müssen manuell geändert werden:
@@ -8,12 +8,91 @@ Diese Werte müssen manuell geändert werden:
 TEXTURE_FOLDER: Der Pfad im Unreal Engine Projektordner, in den die Texturen importiert werden sollen.
 LOCAL_TEXTURE_PATH: Der lokale Pfad, in dem die von TextureLab (texturelab.py) generierten Texturen gespeichert werden.
 RESOLUTION: Die Auflösung der Texturen, die importiert werden sollen.
+MATERIAL_NAME: Der Name des Materials, das beim ersten Lauf erstellt und danach aktualisiert wird.
 """
 
 # Unreal Engine-konforme Pfade
 TEXTURE_FOLDER = "/Game/Textures"  # Unreal Engine Zielordner
 LOCAL_TEXTURE_PATH = "F:/texturecreator/output_textures/"  # Lokaler Output-Ordner
 RESOLUTION = "2K"  # Ändere je nach Auflösung
+MATERIAL_NAME = "TextureLabMaterial"  # Wird bei jedem Lauf aktualisiert statt neu erstellt
+
+# Manifest, das TextureLab neben die Texturen schreibt (Hash, Größe und Parameter jeder Datei)
+MANIFEST_NAME = "texturelab_manifest.json"
+# Metadaten-Tag, in dem der Hash der zuletzt importierten Datei am Asset gespeichert wird
+HASH_TAG = "TextureLabSHA256"
+
+# Gepackte Texturen von TextureLab (z. B. "python texturelab.py batch ... --pack-orm --pack-opacity")
+# ORM: R = Ambient Occlusion, G = Roughness, B = Metallic
+# Base: RGB = Base Color, A = Opacity
+PACKED_TEXTURES = {
+    "orm": ["ao", "roughness", "metallic"],
+    "base": ["opacity"],
+}
+
+def get_texture_files():
+    """
+    Ermittelt die Dateinamen der Texturen basierend auf der Auflösung.
+
+    Liegt eine gepackte Textur im lokalen Output-Ordner, ersetzt sie die einzelnen Texturen, deren Daten sie enthält.
+    """
+    texture_files = {}
+    for texture_type in ["normal", "specular", "ao", "metallic", "emission", "opacity", "roughness"]:
+        texture_files[texture_type] = "{}_map_{}.png".format(texture_type, RESOLUTION)
+
+    for packed_type, contained_types in PACKED_TEXTURES.items():
+        filename = "{}_map_{}.png".format(packed_type, RESOLUTION)
+        if os.path.exists(os.path.join(LOCAL_TEXTURE_PATH, filename)):
+            for texture_type in contained_types:
+                texture_files.pop(texture_type, None)
+            texture_files[packed_type] = filename
+
+    return texture_files
+
+def get_asset_path(texture_type):
+    """
+    Gibt den Unreal Asset-Pfad einer importierten Textur zurück (ohne Dateiendung).
+    """
+    return "{}/{}_map_{}".format(TEXTURE_FOLDER, texture_type, RESOLUTION)
+
+def get_material_path():
+    """
+    Gibt den Unreal Asset-Pfad des Materials zurück.
+    """
+    return "{}/{}".format(TEXTURE_FOLDER, MATERIAL_NAME)
+
+def load_manifest():
+    """
+    Liest das Manifest von TextureLab aus dem lokalen Output-Ordner.
+
+    Gibt die Einträge nach Dateinamen zurück, oder None, wenn kein lesbares Manifest vorhanden ist.
+    """
+    manifest_path = os.path.join(LOCAL_TEXTURE_PATH, MANIFEST_NAME)
+    try:
+        with open(manifest_path, encoding="utf-8") as manifest_file:
+            return json.load(manifest_file)["files"]
+    except (OSError, ValueError, KeyError):
+        print("Kein Manifest gefunden, alle Texturen werden importiert: {}".format(manifest_path))
+        return None
+
+def get_changed_textures(texture_files, manifest):
+    """
+    Ermittelt die Texturen, deren Inhalt sich seit dem letzten Import geändert hat.
+
+    Der Hash der zuletzt importierten Datei ist als Metadaten-Tag am Asset gespeichert. Texturen ohne Manifest-Eintrag
+    oder ohne Asset gelten immer als geändert.
+    """
+    changed_files = {}
+    for texture_type, filename in texture_files.items():
+        entry = (manifest or {}).get(filename)
+        asset_path = get_asset_path(texture_type)
+        if entry is not None and unreal.EditorAssetLibrary.does_asset_exist(asset_path):
+            asset = unreal.EditorAssetLibrary.load_asset(asset_path)
+            if asset and unreal.EditorAssetLibrary.get_metadata_tag(asset, HASH_TAG) == entry["sha256"]:
+                print("Unverändert, wird übersprungen: {}".format(filename))
+                continue
+        changed_files[texture_type] = filename
+    return changed_files
 
 def import_textures():
     """
@@ -21,21 +100,21 @@ def import_textures():
 
     Der Unreal Engine Projektordner ist der Ordner, in dem alle Assets und Ressourcen für ein Unreal Engine Projekt gespeichert werden.
     Der Texture Output Ordner ist der lokale Ordner, in dem die von TextureLab (texturelab.py) generierten Texturen gespeichert werden.
+    Liegt dort ein Manifest, werden nur Texturen importiert, deren Hash sich seit dem letzten Import geändert hat.
+
+    Gibt die importierten Texturen als Dictionary von Texturtyp zu Dateiname zurück.
     """
     print("Starte Import der Texturen...")
 
     # Definiert die Dateinamen der Texturen basierend auf der Auflösung
-    texture_files = {
-        "normal": "normal_map_{}.png".format(RESOLUTION),
-        "specular": "specular_map_{}.png".format(RESOLUTION),
-        "ao": "ao_map_{}.png".format(RESOLUTION),
-        "metallic": "metallic_map_{}.png".format(RESOLUTION),
-        "emission": "emission_map_{}.png".format(RESOLUTION),
-        "opacity": "opacity_map_{}.png".format(RESOLUTION),
-        "roughness": "roughness_map_{}.png".format(RESOLUTION),
-    }
+    manifest = load_manifest()
+    texture_files = get_changed_textures(get_texture_files(), manifest)
+    if not texture_files:
+        print("Alle Texturen sind aktuell.")
+        return {}
 
     tasks = []
+    imported_files = {}
     for texture_type, filename in texture_files.items():
         # Erstellt den vollständigen Pfad zur Texturdatei
         full_path = os.path.join(LOCAL_TEXTURE_PATH, filename).replace("\\", "/")
@@ -51,56 +130,82 @@ def import_textures():
             task.automated = True
             task.replace_existing = True
             tasks.append(task)
+            imported_files[texture_type] = filename
             print("Task erstellt für: {}".format(full_path))
         except Exception as e:
             print("Fehler beim Erstellen des Tasks: {}".format(e))
 
     if tasks:
         try:
-            # Importiert die Texturen in Unreal Engine
+            # Importiert alle geänderten Texturen in einem Durchgang in Unreal Engine
             unreal.AssetToolsHelpers.get_asset_tools().import_asset_tasks(tasks)
             print("Texturen wurden importiert!")
 
             # Debug-Ausgabe: Überprüfe, ob die Texturen geladen werden können
-            for texture_type, filename in texture_files.items():
-                asset_name = filename.split(".")[0]  # Entfernt .png
-                asset_path = "/Game/Textures/{}".format(asset_name)
+            for texture_type, filename in imported_files.items():
+                asset_path = get_asset_path(texture_type)
                 if unreal.EditorAssetLibrary.does_asset_exist(asset_path):
                     print("Textur erfolgreich importiert: {}".format(asset_path))
                 else:
                     print("Textur nicht gefunden: {}".format(asset_path))
+                    continue
+
+                texture = unreal.EditorAssetLibrary.load_asset(asset_path)
+
+                # Gepackte ORM-Daten sind linear und werden als Masken komprimiert
+                if texture_type == "orm":
+                    texture.set_editor_property("srgb", False)
+                    texture.set_editor_property("compression_settings", unreal.TextureCompressionSettings.TC_MASKS)
+
+                # Hash merken, damit die Datei beim nächsten Lauf nur bei Änderungen importiert wird
+                entry = (manifest or {}).get(filename)
+                if entry is not None:
+                    unreal.EditorAssetLibrary.set_metadata_tag(texture, HASH_TAG, entry["sha256"])
+                unreal.EditorAssetLibrary.save_loaded_asset(texture)
 
         except Exception as e:
             print("Fehler beim Importieren der Texturen: {}".format(e))
+            return {}
     else:
         print("Keine gültigen Texturen gefunden.")
 
-def create_material():
+    return imported_files
+
+def get_or_create_material():
     """
-    Erstellt ein neues Material in Unreal Engine und fügt die importierten Texturen hinzu.
+    Lädt das Material mit dem Namen MATERIAL_NAME und entfernt seine Knoten, oder erstellt es, wenn es noch nicht existiert.
     """
-    print("Erstelle Material...")
+    material_path = get_material_path()
+    editor_asset_lib = unreal.EditorAssetLibrary()
 
-    try:
-        # Neues Material erstellen
-        material_factory = unreal.MaterialFactoryNew()
-
-        # Erstellt einen eindeutigen Namen für das Material basierend auf der aktuellen Zeit
-        material_name = "GeneratedMaterial_{}".format(int(time.time()))
+    if editor_asset_lib.does_asset_exist(material_path):
+        material = editor_asset_lib.load_asset(material_path)
+        if material:
+            # Die Verbindungen werden anschließend vollständig neu aufgebaut
+            unreal.MaterialEditingLibrary.delete_all_material_expressions(material)
+            print("Vorhandenes Material wird aktualisiert: {}".format(material_path))
+        return material
 
-        # Definiert den Pfad für das neue Material
-        material_path = TEXTURE_FOLDER + "/" + material_name
-        material = unreal.AssetToolsHelpers.get_asset_tools().create_asset(material_name, TEXTURE_FOLDER, None, material_factory)
+    # Neues Material erstellen
+    material_factory = unreal.MaterialFactoryNew()
+    material = unreal.AssetToolsHelpers.get_asset_tools().create_asset(MATERIAL_NAME, TEXTURE_FOLDER, None, material_factory)
+    if not material:
+        print("Material konnte nicht erstellt werden!")
+        return None
 
-        if not material:
-            print("Material konnte nicht erstellt werden!")
-            return
+    print("Material erstellt: {}".format(material.get_path_name()))
+    return editor_asset_lib.load_asset(material_path)
 
-        print("Material erstellt: {}".format(material.get_path_name()))
+def create_material():
+    """
+    Erstellt das Material in Unreal Engine bzw. aktualisiert das vorhandene und fügt die importierten Texturen hinzu.
+    """
+    print("Erstelle Material...")
 
-        # Material laden und bearbeiten
+    try:
+        # Material laden oder beim ersten Lauf erstellen
         editor_asset_lib = unreal.EditorAssetLibrary()
-        material = editor_asset_lib.load_asset(material_path)
+        material = get_or_create_material()
 
         if not material:
             print("Material konnte nicht geladen werden!")
@@ -109,9 +214,9 @@ def create_material():
         print("Material erfolgreich geladen.")
 
         # Normal Map hinzufügen
-        normal_map = editor_asset_lib.load_asset(TEXTURE_FOLDER + "/normal_map_{}.png".format(RESOLUTION))
+        normal_map = editor_asset_lib.load_asset(get_asset_path("normal"))
         if not normal_map:
-            print("Normal Map nicht gefunden: {}/normal_map_{}.png".format(TEXTURE_FOLDER, RESOLUTION))
+            print("Normal Map nicht gefunden: {}".format(get_asset_path("normal")))
             return
 
         # Erstellt einen Material-Expression für die Normal Map
@@ -122,7 +227,7 @@ def create_material():
         print("Normal Map erfolgreich hinzugefügt.")
 
         # Specular Map hinzufügen (Beispiel für weitere Texturen)
-        specular_map = editor_asset_lib.load_asset(TEXTURE_FOLDER + "/specular_map_{}.png".format(RESOLUTION))
+        specular_map = editor_asset_lib.load_asset(get_asset_path("specular"))
         if specular_map:
             # Erstellt einen Material-Expression für die Specular Map
             specular_expression = unreal.MaterialEditingLibrary.create_material_expression(material, unreal.MaterialExpressionTextureSample, -400, -200)
@@ -130,16 +235,50 @@ def create_material():
             unreal.MaterialEditingLibrary.connect_material_property(specular_expression, "RGB", unreal.MaterialProperty.MP_SPECULAR)
             print("Specular Map erfolgreich hinzugefügt.")
 
-        # Speichern
+        # Gepackte ORM Map hinzufügen (R = AO, G = Roughness, B = Metallic)
+        if editor_asset_lib.does_asset_exist(get_asset_path("orm")):
+            orm_map = editor_asset_lib.load_asset(get_asset_path("orm"))
+            orm_expression = unreal.MaterialEditingLibrary.create_material_expression(material, unreal.MaterialExpressionTextureSample, -400, 200)
+            orm_expression.texture = orm_map
+            orm_expression.sampler_type = unreal.MaterialSamplerType.SAMPLERTYPE_MASKS
+            unreal.MaterialEditingLibrary.connect_material_property(orm_expression, "R", unreal.MaterialProperty.MP_AMBIENT_OCCLUSION)
+            unreal.MaterialEditingLibrary.connect_material_property(orm_expression, "G", unreal.MaterialProperty.MP_ROUGHNESS)
+            unreal.MaterialEditingLibrary.connect_material_property(orm_expression, "B", unreal.MaterialProperty.MP_METALLIC)
+            print("ORM Map erfolgreich hinzugefügt.")
+
+        # Gepackte Base Map hinzufügen (RGB = Base Color, A = Opacity)
+        if editor_asset_lib.does_asset_exist(get_asset_path("base")):
+            base_map = editor_asset_lib.load_asset(get_asset_path("base"))
+            base_expression = unreal.MaterialEditingLibrary.create_material_expression(material, unreal.MaterialExpressionTextureSample, -400, 400)
+            base_expression.texture = base_map
+            unreal.MaterialEditingLibrary.connect_material_property(base_expression, "RGB", unreal.MaterialProperty.MP_BASE_COLOR)
+            unreal.MaterialEditingLibrary.connect_material_property(base_expression, "A", unreal.MaterialProperty.MP_OPACITY_MASK)
+            material.set_editor_property("blend_mode", unreal.BlendMode.BLEND_MASKED)
+            print("Base Map erfolgreich hinzugefügt.")
+        else:
+            material.set_editor_property("blend_mode", unreal.BlendMode.BLEND_OPAQUE)
+
+        # Neu kompilieren und speichern
+        unreal.MaterialEditingLibrary.recompile_material(material)
         unreal.EditorAssetLibrary.save_loaded_asset(material)
         print("Material wurde gespeichert: {}".format(material.get_path_name()))
 
     except Exception as e:
         print("Fehler beim Erstellen des Materials: {}".format(e))
 
-# Ausführen
-print("Starte Textur-Import...")
-import_textures()
+def main():
+    """
+    Importiert die geänderten Texturen und aktualisiert das Material, wenn nötig.
+    """
+    print("Starte Textur-Import...")
+    imported_files = import_textures()
 
-print("Erstelle Material...")
-create_material()
+    # Ohne neue Texturen bleibt ein vorhandenes Material unverändert, es verweist bereits auf die Assets
+    if imported_files or not unreal.EditorAssetLibrary.does_asset_exist(get_material_path()):
+        create_material()
+    else:
+        print("Material ist aktuell: {}".format(get_material_path()))
+
+# Ausführen
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+import importlib.util
+import multiprocessing
+import numpy as np
+import cv2
+from PIL import Image
+
+from texturelab import resolutions, texture_backends, precisions, output_formats, create_category_nodes, generate_texture_with_network, process_texture, TextureWriter, get_worker_pool, shutdown_worker_pool, peak_rss
+
+# ---------------------------
+# Benchmark-Fälle
+# ---------------------------
+
+benchmark_targets = ("network", "texture")
+
+# Dieselben Standardwerte wie im Batch-Modus
+texture_params = {
+    "strength": 5,
+    "scale": 1.0,
+    "invert_specular": False,
+    "blur_radius": 5,
+    "metallic_intensity": 1.0,
+    "emission_intensity": 1.0,
+    "opacity_threshold": 128,
+    "invert_roughness": False
+}
+
+sample_input = os.path.join(os.path.dirname(os.path.abspath(__file__)), "texture_0.jpg")
+
+def synthetic_image(size=1024, seed=0):
+    """
+    Creates a reproducible synthetic input image.
+
+    The image combines smooth gradients with seeded noise, so the blur, threshold and
+    gradient stages see both flat areas and detail.
+
+    Args:
+        size (int, optional): The edge length of the square image. Defaults to 1024.
+        seed (int, optional): Seed for the noise. Defaults to 0.
+
+    Returns:
+        PIL.Image: The RGB image.
+    """
+    rng = np.random.default_rng(seed)
+    ramp = np.linspace(0, 255, size, dtype=np.float32)
+    image_array = np.stack([
+        np.broadcast_to(ramp, (size, size)),
+        np.broadcast_to(ramp[:, None], (size, size)),
+        np.full((size, size), 128, dtype=np.float32)
+    ], axis=-1)
+    image_array = image_array + rng.normal(0, 32, image_array.shape)
+    return Image.fromarray(np.clip(image_array, 0, 255).astype(np.uint8), "RGB")
+
+def load_input(name):
+    """
+    Loads a benchmark input.
+
+    Args:
+        name (str): "synthetic" for ``synthetic_image()`` or the path of an image file.
+
+    Returns:
+        PIL.Image: The RGB image.
+    """
+    if name == "synthetic":
+        return synthetic_image()
+    with Image.open(name) as source:
+        return source.convert("RGB")
+
+def available_backends():
+    """
+    Returns the backends that can run in this environment.
+
+    Returns:
+        list: The entries of ``texture_backends``, without "torch" if torch is missing.
+    """
+    return [backend for backend in texture_backends if backend != "torch" or importlib.util.find_spec("torch") is not None]
+
+def benchmark_cases(targets, inputs, resolution_names, backends, worker_counts, repeats, warmup, write, precision="float32"):
+    """
+    Builds the list of cases for every combination of the given settings.
+
+    Worker counts only apply to the "multiprocessing" backend, the other backends get
+    one case with ``workers`` set to None. The "network" target calls
+    ``generate_texture_with_network``, which needs torch, and is skipped without it.
+
+    Returns:
+        list: The cases as dictionaries.
+    """
+    cases = []
+    for target in targets:
+        if target == "network" and importlib.util.find_spec("torch") is None:
+            print("Ziel 'network' übersprungen: torch ist nicht installiert.")
+            continue
+        for input_name in inputs:
+            for resolution in resolution_names:
+                for backend in backends:
+                    for workers in (worker_counts if backend == "multiprocessing" else [None]):
+                        cases.append({
+                            "target": target,
+                            "input": input_name,
+                            "resolution": resolution,
+                            "backend": backend,
+                            "workers": workers,
+                            "precision": precision,
+                            "repeats": repeats,
+                            "warmup": warmup,
+                            "write": write
+                        })
+    return cases
+
+def case_key(case):
+    """
+    Returns the key used to match a case between two benchmark runs.
+    """
+    return (case["target"], os.path.basename(case["input"]), case["resolution"], case["backend"], case["workers"], case.get("precision", "float32"))
+
+def case_label(case):
+    """
+    Returns a short readable description of a case.
+    """
+    workers = f" x{case['workers']}" if case["workers"] is not None else ""
+    precision = f" {case['precision']}" if case.get("precision", "float32") != "float32" else ""
+    return f"{case['target']:<8} {os.path.basename(case['input']):<14} {case['resolution']:<8} {case['backend']}{workers}{precision}"
+
+# ---------------------------
+# Messung
+# ---------------------------
+
+def summarize_latencies(latencies, pixels):
+    """
+    Computes latency percentiles and throughput from the timed runs of one case.
+
+    Args:
+        latencies (list): The wall time of each run in seconds.
+        pixels (int): The number of output pixels per run.
+
+    Returns:
+        dict: The minimum, mean, p50, p90 and p99 latency in seconds and the throughput
+        in megapixels per second at the median latency.
+    """
+    latencies = np.asarray(latencies, dtype=np.float64)
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    return {
+        "latency": {
+            "min": float(latencies.min()),
+            "mean": float(latencies.mean()),
+            "p50": float(p50),
+            "p90": float(p90),
+            "p99": float(p99)
+        },
+        "throughput_mps": pixels / 1e6 / p50 if p50 > 0 else None
+    }
+
+def run_case(case):
+    """
+    Runs one benchmark case in the current process.
+
+    The network cache is bypassed and the seed is fixed, so every run does the same work.
+    Without ``write`` the maps are only computed, with it they are also encoded into a
+    temporary folder in the given output format.
+
+    Args:
+        case (dict): A case from ``benchmark_cases``.
+
+    Returns:
+        dict: The case with its latency, throughput and peak memory.
+    """
+    image = load_input(case["input"])
+    width, height = resolutions[case["resolution"]]
+    backend = case["backend"]
+    if backend == "multiprocessing":
+        # Den Pool vorab starten, damit der Start nicht in die erste Messung fällt
+        get_worker_pool(case["workers"])
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        if case["target"] == "network":
+            def run():
+                generate_texture_with_network(image, create_category_nodes(0), case["resolution"], backend, case["precision"])
+        else:
+            def run():
+                if case["write"]:
+                    with TextureWriter(case["write"]) as writer:
+                        process_texture(image, **texture_params, resolution=case["resolution"], backend=backend, seed=0, use_cache=False, output_dir=output_dir, writer=writer, precision=case["precision"])
+                else:
+                    process_texture(image, **texture_params, resolution=case["resolution"], backend=backend, seed=0, use_cache=False, output_dir=None, precision=case["precision"])
+
+        for _ in range(case["warmup"]):
+            run()
+        latencies = []
+        for _ in range(case["repeats"]):
+            start_time = time.perf_counter()
+            run()
+            latencies.append(time.perf_counter() - start_time)
+
+    result = {**case, "pixels": width * height, **summarize_latencies(latencies, width * height), "peak_rss": peak_rss()}
+    if backend == "multiprocessing":
+        # Erst nach dem Beenden der Worker ist deren Spitzen-RSS abrufbar
+        shutdown_worker_pool()
+        result["peak_rss_workers"] = peak_rss(children=True)
+    return result
+
+def run_case_isolated(case):
+    """
+    Runs one benchmark case in a fresh interpreter.
+
+    Every case starts from the same state: no warm caches, no worker pool of an earlier
+    case and a peak RSS that only reflects this case.
+
+    Args:
+        case (dict): A case from ``benchmark_cases``.
+
+    Returns:
+        dict: The result of ``run_case``, or the case with an "error" entry if the
+        process failed, e.g. because the resolution does not fit into memory.
+    """
+    completed = subprocess.run([sys.executable, os.path.abspath(__file__), "case", json.dumps(case)], capture_output=True, text=True)
+    if completed.returncode != 0:
+        lines = completed.stderr.strip().splitlines() or [f"Exit-Code {completed.returncode}"]
+        return {**case, "error": lines[-1]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def environment_info():
+    """
+    Describes the machine and library versions a benchmark ran with.
+
+    Returns:
+        dict: The environment information.
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": multiprocessing.cpu_count()
+    }
+
+def format_result(result):
+    """
+    Formats one result as a line of the console report.
+    """
+    if "error" in result:
+        return f"{case_label(result)}  Fehler: {result['error']}"
+    latency = result["latency"]
+    rss = f"{result['peak_rss'] / 2**20:.0f} MiB" if result["peak_rss"] is not None else "n/a"
+    return f"{case_label(result)}  {result['throughput_mps']:8.2f} MP/s  p50 {latency['p50'] * 1000:9.1f} ms  p90 {latency['p90'] * 1000:9.1f} ms  p99 {latency['p99'] * 1000:9.1f} ms  RSS {rss}"
+
+# ---------------------------
+# Vergleich mit einer Baseline
+# ---------------------------
+
+def compare_results(baseline, current, threshold=0.1):
+    """
+    Compares two benchmark reports case by case.
+
+    A case regresses if its median latency or its peak RSS grew by more than
+    ``threshold`` relative to the baseline. A case that succeeded in the baseline also
+    regresses if it failed in the current run ("error", e.g. killed at 8K) or is missing
+    from it ("missing"). Cases that are new or failed in the baseline are not compared.
+
+    Args:
+        baseline (dict): The stored baseline report.
+        current (dict): The report to check.
+        threshold (float, optional): The tolerated relative increase. Defaults to 0.1.
+
+    Returns:
+        list: One entry per compared case with the relative changes and a "regressions"
+        list naming the metrics that got worse.
+    """
+    baseline_results = {case_key(result): result for result in baseline["results"] if "error" not in result}
+    current_keys = {case_key(result) for result in current["results"]}
+    comparisons = []
+    for result in current["results"]:
+        reference = baseline_results.get(case_key(result))
+        if reference is None:
+            continue
+        if "error" in result:
+            comparisons.append({"case": case_label(result), "changes": {}, "regressions": ["error"], "error": result["error"]})
+            continue
+        changes = {"p50": result["latency"]["p50"] / reference["latency"]["p50"] - 1}
+        if result.get("peak_rss") and reference.get("peak_rss"):
+            changes["peak_rss"] = result["peak_rss"] / reference["peak_rss"] - 1
+        comparisons.append({
+            "case": case_label(result),
+            "changes": changes,
+            "regressions": [metric for metric, change in changes.items() if change > threshold]
+        })
+    # Fälle, die in der Baseline liefen, im aktuellen Lauf aber fehlen
+    for key, reference in baseline_results.items():
+        if key not in current_keys:
+            comparisons.append({"case": case_label(reference), "changes": {}, "regressions": ["missing"]})
+    return comparisons
+
+def print_comparison(comparisons):
+    """
+    Prints the comparison and returns the number of regressed cases.
+    """
+    regressed = 0
+    for comparison in comparisons:
+        if "error" in comparison:
+            changes = f"Fehler: {comparison['error']}"
+        elif "missing" in comparison["regressions"]:
+            changes = "fehlt im aktuellen Lauf"
+        else:
+            changes = "  ".join(f"{metric} {change:+.1%}" for metric, change in comparison["changes"].items())
+        marker = "REGRESSION" if comparison["regressions"] else "ok"
+        print(f"{comparison['case']}  {changes}  {marker}")
+        regressed += bool(comparison["regressions"])
+    print(f"{len(comparisons)} Fälle verglichen, {regressed} mit Regression.")
+    return regressed
+
+def load_report(path):
+    with open(path, encoding="utf-8") as report_file:
+        return json.load(report_file)
+
+# ---------------------------
+# Kommandozeile
+# ---------------------------
+
+def run_benchmark(args):
+    """
+    Runs all cases, writes the JSON report and optionally compares it with a baseline.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+
+    Returns:
+        int: The exit code, 1 if a regression against the baseline was found.
+    """
+    cases = benchmark_cases(args.targets, args.inputs, args.resolutions, args.backends, args.workers, args.repeats, args.warmup, args.write, args.precision)
+    results = []
+    for case in cases:
+        result = run_case(case) if args.in_process else run_case_isolated(case)
+        results.append(result)
+        print(format_result(result), flush=True)
+
+    report = {"environment": environment_info(), "results": results}
+    with open(args.output, "w", encoding="utf-8") as report_file:
+        json.dump(report, report_file, indent=2)
+    print(f"Ergebnisse gespeichert: {args.output}")
+
+    if args.baseline:
+        return 1 if print_comparison(compare_results(load_report(args.baseline), report, args.threshold)) else 0
+    return 0
+
+def build_parser():
+    """
+    Builds the command line parser.
+
+    Returns:
+        argparse.ArgumentParser: The parser with the "run" and "compare" commands.
+    """
+    parser = argparse.ArgumentParser(prog="benchmark", description="Reproduzierbare Benchmarks für TextureLab.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Misst alle Kombinationen aus Ziel, Eingabe, Auflösung, Backend und Worker-Anzahl.")
+    run_parser.add_argument("--targets", nargs="+", default=list(benchmark_targets), choices=benchmark_targets, help="network: generate_texture_with_network, texture: process_texture.")
+    run_parser.add_argument("--inputs", nargs="+", default=["synthetic"] + ([sample_input] if os.path.isfile(sample_input) else []), help="Bilddateien oder 'synthetic'.")
+    run_parser.add_argument("-r", "--resolutions", nargs="+", default=list(resolutions), choices=list(resolutions))
+    run_parser.add_argument("--backends", nargs="+", default=available_backends(), choices=texture_backends)
+    run_parser.add_argument("--precision", default="float32", choices=list(precisions))
+    run_parser.add_argument("--workers", nargs="+", type=int, default=sorted({1, multiprocessing.cpu_count()}), help="Worker-Anzahlen für das Backend multiprocessing.")
+    run_parser.add_argument("--repeats", type=int, default=5, help="Gemessene Durchläufe pro Fall.")
+    run_parser.add_argument("--warmup", type=int, default=1, help="Ungemessene Durchläufe vor der Messung.")
+    run_parser.add_argument("--write", choices=list(output_formats), help="Die Karten zusätzlich in diesem Format schreiben.")
+    run_parser.add_argument("--in-process", action="store_true", help="Alle Fälle im selben Prozess statt je in einem neuen Interpreter messen.")
+    run_parser.add_argument("-o", "--output", default="benchmark_results.json", help="Zieldatei für die JSON-Ergebnisse.")
+    run_parser.add_argument("--baseline", help="Gespeicherte Ergebnisse, mit denen verglichen wird.")
+    run_parser.add_argument("--threshold", type=float, default=0.1, help="Tolerierte relative Verschlechterung (Standard: 0.1).")
+
+    compare_parser = commands.add_parser("compare", help="Vergleicht gespeicherte Ergebnisse mit einer Baseline.")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="Tolerierte relative Verschlechterung (Standard: 0.1).")
+
+    # Intern: führt einen einzelnen Fall aus und gibt das Ergebnis als JSON aus
+    case_parser = commands.add_parser("case")
+    case_parser.add_argument("case")
+    return parser
+
+def main(argv=None):
+    """
+    Entry point of the benchmark suite.
+
+    Args:
+        argv (list, optional): The command line arguments. Defaults to ``sys.argv[1:]``.
+
+    Returns:
+        int: The exit code.
+    """
+    args = build_parser().parse_args(argv)
+    if args.command == "case":
+        print(json.dumps(run_case(json.loads(args.case))))
+        return 0
+    if args.command == "compare":
+        return 1 if print_comparison(compare_results(load_report(args.baseline), load_report(args.current), args.threshold)) else 0
+    return run_benchmark(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# texturelab.py liegt im Wurzelverzeichnis und ist kein installiertes Paket
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import texturelab
+
+params = {
+    "strength": 1.0,
+    "scale": 1.0,
+    "invert_specular": False,
+    "blur_radius": 5,
+    "metallic_intensity": 1.0,
+    "emission_intensity": 1.0,
+    "opacity_threshold": 128,
+    "invert_roughness": False
+}
+
+
+@pytest.fixture
+def image():
+    texturelab.network_cache.clear()
+    yield Image.fromarray(np.random.default_rng(0).integers(0, 256, (30, 40, 3), dtype=np.uint8))
+    texturelab.network_cache.clear()
+
+
+def texture_maps_at(image, seed):
+    return texturelab.process_texture(image, **params, resolution=(40, 30), seed=seed, output_dir=None)
+
+
+def test_seeded_calls_hit_the_cache(image):
+    expected = texture_maps_at(image, 3)
+
+    result = texture_maps_at(image, 3)
+
+    assert texturelab.network_cache.stats()["hits"] == 1
+    for name in expected:
+        np.testing.assert_array_equal(result[name], expected[name])
+
+
+def test_unseeded_calls_skip_the_cache(image):
+    for _ in range(3):
+        texture_maps_at(image, None)
+
+    assert texturelab.network_cache.stats() == {"hits": 0, "misses": 0, "entries": 0, "bytes": 0}
+
+
+@pytest.mark.parametrize("calls", [1, 2])
+def test_returned_maps_are_writable_and_independent(image, calls):
+    for _ in range(calls):
+        textures = texture_maps_at(image, 3)
+
+    maps = list(textures.values())
+    assert all(texture.flags.writeable for texture in maps)
+    assert not any(np.shares_memory(a, b) for i, a in enumerate(maps) for b in maps[i + 1:])
+    textures["Normal Map"][:] = 0
+    np.testing.assert_array_equal(texture_maps_at(image, 3)["Specular Map"], textures["Specular Map"])
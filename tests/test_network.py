@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import texturelab
+
+torch = pytest.importorskip("torch")
+
+
+@pytest.fixture
+def image():
+    rng = np.random.default_rng(0)
+    return Image.fromarray(rng.integers(0, 256, (30, 40, 3), dtype=np.uint8))
+
+
+def reference_network_stage(image, category_nodes):
+    # Die ursprüngliche Rechnung: float64-Division, float32-Tensor, Pixelschleife in process_chunk
+    image_tensor = torch.tensor(np.array(image) / 255.0, dtype=torch.float32).permute(2, 0, 1)
+    _, modified_chunk = texturelab.ImageNode("Temp").process_chunk((image_tensor, 0, image_tensor.shape[1], category_nodes))
+    return modified_chunk.permute(1, 2, 0).numpy()
+
+
+@pytest.mark.parametrize("backend", texturelab.texture_backends)
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_network_stage_matches_pixel_loop(image, backend, seed):
+    category_nodes = texturelab.create_category_nodes(seed)
+    expected = reference_network_stage(image, category_nodes)
+
+    result = texturelab.run_network_stage(np.asarray(image), category_nodes, backend)
+
+    assert result.dtype == np.float32
+    np.testing.assert_array_equal(result, expected)
+
+
+@pytest.mark.parametrize("backend", texturelab.texture_backends)
+def test_generate_texture_with_network_matches_pixel_loop(image, backend):
+    category_nodes = texturelab.create_category_nodes(7)
+    expected = reference_network_stage(texturelab.resize_to_resolution(image, (40, 30)), category_nodes)
+
+    result = texturelab.generate_texture_with_network(image, category_nodes, (40, 30), backend)
+
+    np.testing.assert_array_equal(result.permute(1, 2, 0).numpy(), expected)
@@ -0,0 +1,107 @@
+import random
+
+import numpy as np
+import pytest
+
+import texturelab
+
+
+def propagate_nodes(nodes, steps):
+    # Referenz: das ursprüngliche Objektmodell, Knoten für Knoten in Listenreihenfolge
+    activations = []
+    for signals in steps:
+        for node, signal in zip(nodes, signals):
+            if not np.isnan(signal):
+                node.propagate_signal(signal)
+        activations.append([node.activation for node in nodes])
+    return np.array(activations)
+
+
+def random_nodes(seed, count=6):
+    rng = random.Random(seed)
+    nodes = [texturelab.Node(str(i)) for i in range(count)]
+    for node in nodes:
+        node.activation = rng.uniform(0, 1)
+        for target in rng.sample([other for other in nodes if other is not node], 3):
+            node.add_connection(target, rng.uniform(0.1, 1.0))
+    # Selbstverbindungen zuletzt, siehe NodeGraph.propagate_steps
+    for node in nodes[::2]:
+        node.add_connection(node, rng.uniform(0.1, 1.0))
+    return nodes
+
+
+def test_repeated_signal_accumulates_in_target():
+    a, b = texturelab.Node("A"), texturelab.Node("B")
+    a.add_connection(b, 0.5)
+    graph = texturelab.NodeGraph.from_nodes([a, b])
+
+    outputs = graph.propagate_steps([[1, np.nan], [1, np.nan]])
+
+    np.testing.assert_allclose(outputs[-1], propagate_nodes([a, b], [[1, np.nan], [1, np.nan]])[-1])
+    assert outputs[-1, 1] == 1.0
+
+
+def test_later_signal_overwrites_accumulated_activation():
+    a, b = texturelab.Node("A"), texturelab.Node("B")
+    a.add_connection(b, 0.5)
+    graph = texturelab.NodeGraph.from_nodes([a, b])
+
+    np.testing.assert_array_equal(graph.propagate([1, 2]), [1.0, 2.0])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_propagate_steps_matches_nodes(seed):
+    rng = np.random.default_rng(seed)
+    steps = rng.uniform(-0.5, 1.0, (40, 6))
+    steps[rng.random(steps.shape) < 0.4] = np.nan
+    nodes = random_nodes(seed)
+    graph = texturelab.NodeGraph.from_nodes(nodes)
+
+    outputs = graph.propagate_steps(steps)
+
+    np.testing.assert_allclose(outputs, propagate_nodes(nodes, steps), rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(graph.activations, [node.activation for node in nodes], rtol=1e-12)
+
+
+def test_to_nodes_round_trip():
+    graph = texturelab.NodeGraph.from_nodes(random_nodes(0))
+
+    copy = texturelab.NodeGraph.from_nodes(graph.to_nodes())
+
+    np.testing.assert_array_equal(copy.weights, graph.weights)
+    np.testing.assert_array_equal(copy.activations, graph.activations)
+
+
+def test_activation_history_wraps_around():
+    graph = texturelab.NodeGraph(["A", "B"], history_size=4)
+    steps = np.arange(14, dtype=np.float64).reshape(7, 2)
+
+    graph.propagate_steps(steps[:3])
+    np.testing.assert_array_equal(graph.activation_history, steps[:3])
+
+    graph.propagate_steps(steps[3:])
+    np.testing.assert_array_equal(graph.activation_history, steps[3:])
+
+    graph.propagate_steps(steps[:6])
+    np.testing.assert_array_equal(graph.activation_history, steps[2:6])
+    assert graph.history_count == 13
+
+
+def test_record_keeps_only_the_newest_rows():
+    graph = texturelab.NodeGraph(["A"], history_size=3)
+
+    graph.record(np.arange(5, dtype=np.float64)[:, None])
+    graph.record(np.array([[5.0]]))
+
+    np.testing.assert_array_equal(graph.activation_history[:, 0], [3, 4, 5])
+
+
+def test_node_histories_are_bounded():
+    source, target = texturelab.Node("A"), texturelab.Node("B")
+    source.add_connection(target, 0.5)
+
+    for _ in range(texturelab.history_length + 10):
+        source.propagate_signal(1)
+
+    assert len(source.activation_history) == texturelab.history_length
+    assert len(source.connections[0].weight_history) == texturelab.history_length
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import texturelab
+
+params = {
+    "strength": 1.0,
+    "scale": 1.0,
+    "invert_specular": False,
+    "blur_radius": 5,
+    "metallic_intensity": 1.0,
+    "emission_intensity": 1.0,
+    "opacity_threshold": 200,
+    "invert_roughness": False
+}
+
+
+@pytest.mark.parametrize("mode", ["RGB", "L"])
+def test_base_alpha_is_binary_opacity(mode):
+    image = Image.fromarray(np.random.default_rng(0).integers(0, 256, (30, 40, 3), dtype=np.uint8)).convert(mode)
+
+    textures = texturelab.process_texture(image, **params, resolution=(40, 30), maps=["opacity", "base"], seed=1, use_cache=False, output_dir=None)
+
+    alpha = textures["Base Map"][..., 3]
+    opacity_map = textures["Opacity Map"]
+    assert set(np.unique(alpha)) <= {0, 255}
+    np.testing.assert_array_equal(alpha, opacity_map.max(axis=2) if opacity_map.ndim == 3 else opacity_map)
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import texturelab
+
+# Parameter der Oberfläche (Standardwerte der Regler)
+params = {
+    "strength": 1.0,
+    "scale": 1.0,
+    "invert_specular": False,
+    "blur_radius": 5,
+    "metallic_intensity": 1.0,
+    "emission_intensity": 1.0,
+    "opacity_threshold": 0.5,
+    "invert_roughness": False
+}
+
+
+@pytest.fixture
+def image():
+    rng = np.random.default_rng(0)
+    return Image.fromarray(rng.integers(0, 256, (30, 40, 3), dtype=np.uint8))
+
+
+def texture_maps_at(image, seed, precision):
+    return texturelab.process_texture(image, **params, resolution=(40, 30), seed=seed, use_cache=False, output_dir=None, precision=precision)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_uint8_matches_float32(image, seed):
+    expected = texture_maps_at(image, seed, "float32")
+
+    result = texture_maps_at(image, seed, "uint8")
+
+    assert list(result) == list(expected)
+    for name in expected:
+        assert result[name].dtype == expected[name].dtype
+        np.testing.assert_array_equal(result[name], expected[name], err_msg=name)
+
+
+def test_float16_normal_map_within_one_level(image):
+    for seed in range(50):
+        expected = texture_maps_at(image, seed, "float32")["Normal Map"]
+
+        result = texture_maps_at(image, seed, "float16")["Normal Map"]
+
+        difference = np.abs(result.astype(np.int16) - expected.astype(np.int16))
+        assert difference.max() <= 1, f"seed {seed}"
+
+
+def test_unknown_precision_is_rejected(image):
+    with pytest.raises(ValueError):
+        texture_maps_at(image, 0, "float8")
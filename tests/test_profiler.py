@@ -0,0 +1,37 @@
+import threading
+
+import numpy as np
+from PIL import Image
+
+import texturelab
+
+
+def test_write_stages_do_not_track_memory(tmp_path):
+    image = Image.fromarray(np.random.default_rng(0).integers(0, 256, (30, 40, 3), dtype=np.uint8))
+
+    with texturelab.Profiler() as profiler:
+        with texturelab.TextureWriter(max_workers=4) as writer:
+            texturelab.process_texture(image, 1.0, 1.0, False, 5, 1.0, 1.0, 128, False, (40, 30), seed=1, use_cache=False, output_dir=str(tmp_path), writer=writer, profiler=profiler)
+        report = profiler.report()
+
+    writes = {name: stage for name, stage in report["stages"].items() if name.startswith("write.")}
+    assert len(writes) == len(texturelab.texture_maps)
+    assert all(stage["peak_memory"] is None for stage in writes.values())
+    assert report["stages"]["normal"]["peak_memory"] is not None
+
+
+def test_only_the_owning_thread_tracks_memory():
+    with texturelab.Profiler() as profiler:
+        with profiler.stage("owner"):
+            block = np.ones(1 << 20)
+
+        def worker():
+            with profiler.stage("worker"):
+                np.ones(1 << 20)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+    assert profiler.stages["owner"]["peak_memory"] >= block.nbytes
+    assert profiler.stages["worker"]["peak_memory"] is None
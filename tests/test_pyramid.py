@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import texturelab
+
+
+def test_pyramid_sources_only_downsample():
+    names = ["4K", "2K", "Full HD", "HD", "Cover"]
+
+    base_resolution, sources = texturelab.pyramid_sources(names)
+
+    assert base_resolution == "4K"
+    for name, source in sources.items():
+        source_size = source if isinstance(source, tuple) else texturelab.resolutions[source]
+        assert source_size[0] >= texturelab.resolutions[name][0]
+        assert source_size[1] >= texturelab.resolutions[name][1]
+
+
+def test_pyramid_sources_use_bounding_size_for_mixed_aspect_ratios():
+    base_resolution, sources = texturelab.pyramid_sources(["Cover", "HD"])
+
+    assert base_resolution == (1280, 1024)
+    assert sources == {"Cover": (1280, 1024), "HD": (1280, 1024)}
+
+
+@pytest.mark.parametrize("names", [["Cover", "HD"], ["HD", "Cover"]])
+def test_pyramid_returns_requested_sizes(names):
+    image = Image.fromarray(np.random.default_rng(0).integers(0, 256, (30, 40, 3), dtype=np.uint8))
+
+    levels = texturelab.process_texture_pyramid(image, 1.0, 1.0, False, 5, 1.0, 1.0, 0.5, False, names, maps=["normal"], seed=1, use_cache=False, output_dir=None)
+
+    assert list(levels) == names
+    for name in names:
+        width, height = texturelab.resolutions[name]
+        assert levels[name]["Normal Map"].shape == (height, width, 3)
@@ -0,0 +1,146 @@
+import importlib
+import json
+import sys
+import types
+from unittest import mock
+
+import pytest
+
+
+class FakeAsset:
+    def __init__(self, path):
+        self.path = path
+        self.properties = {}
+
+    def set_editor_property(self, name, value):
+        self.properties[name] = value
+
+    def get_path_name(self):
+        return self.path
+
+
+class FakeEditorAssetLibrary:
+    # Der Skriptcode nutzt die Bibliothek sowohl statisch als auch über eine Instanz
+    assets = {}
+    tags = {}
+
+    @classmethod
+    def does_asset_exist(cls, path):
+        return path in cls.assets
+
+    @classmethod
+    def load_asset(cls, path):
+        return cls.assets.get(path)
+
+    @classmethod
+    def get_metadata_tag(cls, asset, tag):
+        return cls.tags.get((asset.path, tag))
+
+    @classmethod
+    def set_metadata_tag(cls, asset, tag, value):
+        cls.tags[(asset.path, tag)] = value
+
+    @classmethod
+    def save_loaded_asset(cls, asset):
+        return True
+
+
+@pytest.fixture
+def ue(monkeypatch, tmp_path):
+    """Importiert UE_plugin_script gegen ein nachgebautes ``unreal``-Modul."""
+    FakeEditorAssetLibrary.assets = {}
+    FakeEditorAssetLibrary.tags = {}
+    unreal = types.ModuleType("unreal")
+    unreal.EditorAssetLibrary = FakeEditorAssetLibrary
+    unreal.AssetImportTask = types.SimpleNamespace
+    unreal.MaterialFactoryNew = mock.Mock
+    unreal.MaterialEditingLibrary = mock.Mock()
+    for name in ["MaterialExpressionTextureSample", "MaterialProperty", "MaterialSamplerType", "BlendMode", "TextureCompressionSettings"]:
+        setattr(unreal, name, mock.Mock())
+    asset_tools = mock.Mock()
+    unreal.AssetToolsHelpers = mock.Mock()
+    unreal.AssetToolsHelpers.get_asset_tools.return_value = asset_tools
+    monkeypatch.setitem(sys.modules, "unreal", unreal)
+    monkeypatch.delitem(sys.modules, "UE_plugin_script", raising=False)
+    script = importlib.import_module("UE_plugin_script")
+    monkeypatch.setattr(script, "LOCAL_TEXTURE_PATH", str(tmp_path))
+
+    def import_asset_tasks(tasks):
+        for task in tasks:
+            path = "{}/{}".format(task.destination_path, task.filename.rsplit("/", 1)[-1].rsplit(".", 1)[0])
+            FakeEditorAssetLibrary.assets[path] = FakeAsset(path)
+
+    def create_asset(name, folder, asset_class, factory):
+        path = "{}/{}".format(folder, name)
+        FakeEditorAssetLibrary.assets[path] = FakeAsset(path)
+        return FakeEditorAssetLibrary.assets[path]
+
+    asset_tools.import_asset_tasks.side_effect = import_asset_tasks
+    asset_tools.create_asset.side_effect = create_asset
+    return types.SimpleNamespace(script=script, asset_tools=asset_tools, unreal=unreal, folder=tmp_path)
+
+
+def write_output(ue, hashes):
+    # Legt die Texturen und ein Manifest an, wie sie TextureLab schreibt
+    files = ue.script.get_texture_files()
+    for filename in files.values():
+        (ue.folder / filename).write_bytes(b"png")
+    manifest = {"version": 1, "files": {filename: {"sha256": hashes.get(texture_type, "hash-" + texture_type)} for texture_type, filename in files.items()}}
+    (ue.folder / ue.script.MANIFEST_NAME).write_text(json.dumps(manifest), encoding="utf-8")
+    return files
+
+
+def imported_filenames(ue, call=-1):
+    tasks = ue.asset_tools.import_asset_tasks.call_args_list[call].args[0]
+    return sorted(task.filename.rsplit("/", 1)[-1] for task in tasks)
+
+
+def test_unchanged_texture_is_skipped(ue):
+    files = write_output(ue, {})
+    asset_path = ue.script.get_asset_path("normal")
+    FakeEditorAssetLibrary.assets[asset_path] = FakeAsset(asset_path)
+    FakeEditorAssetLibrary.tags[(asset_path, ue.script.HASH_TAG)] = "hash-normal"
+
+    changed = ue.script.get_changed_textures(files, ue.script.load_manifest())
+
+    assert "normal" not in changed
+    assert sorted(changed) == sorted(texture_type for texture_type in files if texture_type != "normal")
+
+
+def test_changed_textures_are_imported_in_one_batch(ue):
+    files = write_output(ue, {})
+    ue.script.import_textures()
+    ue.asset_tools.import_asset_tasks.reset_mock()
+
+    write_output(ue, {"normal": "new-normal", "roughness": "new-roughness"})
+    imported = ue.script.import_textures()
+
+    assert ue.asset_tools.import_asset_tasks.call_count == 1
+    assert imported_filenames(ue) == sorted([files["normal"], files["roughness"]])
+    assert sorted(imported) == ["normal", "roughness"]
+    assert FakeEditorAssetLibrary.tags[(ue.script.get_asset_path("normal"), ue.script.HASH_TAG)] == "new-normal"
+
+
+def test_second_run_updates_existing_material(ue):
+    write_output(ue, {})
+    ue.script.main()
+    assert ue.asset_tools.create_asset.call_count == 1
+
+    write_output(ue, {"specular": "new-specular"})
+    ue.script.main()
+
+    assert ue.asset_tools.create_asset.call_count == 1
+    material = FakeEditorAssetLibrary.assets[ue.script.get_material_path()]
+    ue.unreal.MaterialEditingLibrary.delete_all_material_expressions.assert_called_once_with(material)
+    assert ue.unreal.MaterialEditingLibrary.recompile_material.call_count == 2
+
+
+def test_unchanged_run_leaves_material_alone(ue):
+    write_output(ue, {})
+    ue.script.main()
+    ue.unreal.MaterialEditingLibrary.reset_mock()
+
+    ue.script.main()
+
+    assert ue.asset_tools.import_asset_tasks.call_count == 1
+    ue.unreal.MaterialEditingLibrary.recompile_material.assert_not_called()
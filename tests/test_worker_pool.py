@@ -0,0 +1,54 @@
+import threading
+
+import numpy as np
+
+import texturelab
+
+
+def test_get_worker_pool_returns_pool_and_size():
+    pool, size = texturelab.get_worker_pool(2)
+
+    assert size == 2
+    assert texturelab.get_worker_pool() == (pool, 2)
+
+
+def test_restart_waits_for_borrowed_pool():
+    texturelab.get_worker_pool(2)
+    restarted = threading.Event()
+
+    def restart():
+        texturelab.get_worker_pool(1)
+        restarted.set()
+
+    with texturelab.borrow_worker_pool() as (pool, size):
+        thread = threading.Thread(target=restart)
+        thread.start()
+        assert not restarted.wait(0.5)
+        # Der ausgeliehene Pool bleibt bis zum Ende des Blocks benutzbar
+        assert pool.map(abs, [-1, -2]) == [1, 2]
+        assert size == 2
+    thread.join()
+    assert texturelab.get_worker_pool()[1] == 1
+
+
+def test_network_stage_survives_concurrent_restarts():
+    image = np.random.default_rng(0).integers(0, 256, (30, 40, 3), dtype=np.uint8)
+    category_nodes = texturelab.create_category_nodes(1)
+    expected = texturelab.run_network_stage(image, category_nodes)
+    results = []
+
+    def run():
+        for _ in range(4):
+            results.append(texturelab.run_network_stage(image, category_nodes, "multiprocessing"))
+
+    threads = [threading.Thread(target=run) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for processes in [1, 3, 2, 1]:
+        texturelab.get_worker_pool(processes)
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 8
+    for result in results:
+        np.testing.assert_array_equal(result, expected)
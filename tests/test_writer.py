@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import texturelab
+
+
+@pytest.mark.parametrize("output_format", texturelab.output_formats)
+@pytest.mark.parametrize("shape", [(30, 40), (30, 40, 3), (30, 40, 4)])
+def test_encode_texture_round_trip(tmp_path, output_format, shape):
+    image = np.random.default_rng(0).integers(0, 256, shape, dtype=np.uint8)
+    path = str(tmp_path / f"map{texturelab.output_formats[output_format]}")
+
+    texturelab.encode_texture(path, image, output_format)
+
+    with Image.open(path) as written:
+        pixels = np.asarray(written)
+    # Auf der Platte liegt die Kanalreihenfolge von OpenCV (BGR) für alle Formate gleich
+    expected = image if image.ndim == 2 else np.concatenate([image[..., 2::-1], image[..., 3:]], axis=2)
+    if output_format == "qoi" and image.ndim == 2:
+        expected = np.dstack([image] * 3)
+    np.testing.assert_array_equal(pixels, expected)
+
+
+def test_writer_saves_grayscale_maps_as_qoi(tmp_path):
+    image = Image.fromarray(np.random.default_rng(0).integers(0, 256, (30, 40), dtype=np.uint8), mode="L")
+
+    with texturelab.TextureWriter("qoi") as writer:
+        textures = texturelab.process_texture(image, 1.0, 1.0, False, 5, 1.0, 1.0, 128, False, (40, 30), seed=1, output_dir=str(tmp_path), writer=writer)
+
+    assert textures["Normal Map"].ndim == 2
+    (path,) = tmp_path.glob("normal_map_*.qoi")
+    with Image.open(path) as written:
+        assert written.mode == "RGB"
@@ -1,16 +1,44 @@
 import os
+import re
 import cv2
 import numpy as np
 from PIL import Image
-import gradio as gr
-import torch
+import sys
+import glob
+import math
+import mmap
+import time
 import random
+import atexit
+import json
+import hashlib
+import logging
+import argparse
+import tempfile
+import threading
+import contextvars
+import tracemalloc
 import multiprocessing
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from multiprocessing import resource_tracker, shared_memory
+
+try:
+    import resource
+except ImportError:
+    # Unter Windows gibt es kein resource-Modul, die Spitzen-RSS wird dann nicht erfasst
+    resource = None
+
+logger = logging.getLogger("texturelab")
 
 # ---------------------------
 # Neuronales Netzwerk-Klassen und Bildverarbeitung
 # ---------------------------
 
+# Maximale Länge der Verläufe, damit langlebige Prozesse nicht unbegrenzt wachsen
+history_length = 1000
+
 class Connection:
     """
     Represents a connection between nodes in a neural network.
@@ -18,12 +46,15 @@ class Connection:
     Attributes:
         target_node (Node): The node to which this connection points.
         weight (float): The weight of the connection.
-        weight_history (list): A history of the weights for this connection.
+        weight_history (collections.deque): The last ``history_length`` weights of this
+            connection.
     """
+    __slots__ = ("target_node", "weight", "weight_history")
+
     def __init__(self, target_node, weight=None):
         self.target_node = target_node
         self.weight = weight if weight is not None else random.uniform(0.1, 1.0)
-        self.weight_history = []
+        self.weight_history = deque(maxlen=history_length)
 
 class Node:
     """
@@ -33,13 +64,16 @@ class Node:
         label (str): The label of the node.
         connections (list): A list of connections from this node to other nodes.
         activation (float): The current activation level of the node.
-        activation_history (list): A history of the activation levels for this node.
+        activation_history (collections.deque): The last ``history_length`` activation
+            levels of this node.
     """
+    __slots__ = ("label", "connections", "activation", "activation_history")
+
     def __init__(self, label):
         self.label = label
         self.connections = []
         self.activation = 0.0
-        self.activation_history = []
+        self.activation_history = deque(maxlen=history_length)
 
     def add_connection(self, target_node, weight=None):
         """
@@ -71,6 +105,8 @@ class ImageNode(Node):
     Attributes:
         image (torch.Tensor): The generated image.
     """
+    __slots__ = ("image",)
+
     def __init__(self, label):
         super().__init__(label)
         self.image = None
@@ -85,32 +121,22 @@ class ImageNode(Node):
         """
         self.image = self.generate_image_from_categories(category_nodes, original_image)
 
-    def generate_image_from_categories(self, category_nodes, original_image):
+    def generate_image_from_categories(self, category_nodes, original_image, backend="vectorized"):
         """
         Generates an image from the category nodes and the original image.
 
         Args:
             category_nodes (list): A list of category nodes.
             original_image (PIL.Image): The original image.
+            backend (str, optional): The engine used to apply the activations, one of
+                ``texture_backends``. Defaults to "vectorized".
 
         Returns:
             torch.Tensor: The generated image tensor.
         """
-        image_array = np.array(original_image) / 255.0
-        image_tensor = torch.tensor(image_array, dtype=torch.float32).permute(2, 0, 1)
-
-        pool = multiprocessing.Pool()
-        chunk_size = image_tensor.shape[1] // multiprocessing.cpu_count()
-        chunks = [(image_tensor, i, chunk_size, category_nodes) for i in range(0, image_tensor.shape[1], chunk_size)]
-        results = pool.map(self.process_chunk, chunks)
-
-        pool.close()
-        pool.join()
+        import torch
 
-        for start_row, modified_chunk in results:
-            image_tensor[:, start_row:start_row + modified_chunk.shape[1], :] = modified_chunk
-
-        return image_tensor
+        return torch.from_numpy(run_network_stage(np.asarray(original_image), category_nodes, backend)).permute(2, 0, 1)
 
     def process_chunk(self, args):
         """
@@ -122,6 +148,8 @@ class ImageNode(Node):
         Returns:
             tuple: A tuple containing the start row and the modified chunk.
         """
+        import torch
+
         image_tensor, start_row, chunk_size, category_nodes = args
         modified_chunk = image_tensor[:, start_row:start_row + chunk_size, :].clone()
         for x in range(modified_chunk.shape[1]):
@@ -132,198 +160,2378 @@ class ImageNode(Node):
                 modified_chunk[:, x, y] = torch.clamp(pixel, 0, 1)
         return start_row, modified_chunk
 
+class NodeGraph:
+    """
+    Array-backed network of nodes for propagating many signals at once.
+
+    The activations are kept as a vector and the connection weights as a dense matrix,
+    where ``weights[i, j]`` is the weight of the connection from node ``i`` to node ``j``.
+    Propagation follows ``Node.propagate_signal``: within a step the nodes that receive a
+    signal propagate in index order, and activations carry over from one step to the
+    next. The activation history is a fixed-size ring buffer of the activations after the
+    last ``history_length`` steps.
+
+    Attributes:
+        labels (list): The labels of the nodes.
+        activations (np.ndarray): The current activation of every node.
+        weights (np.ndarray): The connection weight matrix, zero where nodes are not connected.
+    """
+    __slots__ = ("labels", "activations", "weights", "history", "history_count")
+
+    def __init__(self, labels, history_size=history_length):
+        self.labels = list(labels)
+        self.activations = np.zeros(len(self.labels))
+        self.weights = np.zeros((len(self.labels), len(self.labels)))
+        self.history = np.zeros((history_size, len(self.labels)))
+        self.history_count = 0
+
+    @classmethod
+    def from_nodes(cls, nodes, history_size=history_length):
+        """
+        Builds a graph from ``Node`` objects, keeping their activations and connections.
+
+        Connections to nodes outside of ``nodes`` are dropped. Propagating a step through
+        the graph gives the same activations as calling ``propagate_signal`` on the nodes
+        in list order, up to floating point rounding.
+
+        Args:
+            nodes (list): The nodes.
+            history_size (int, optional): The capacity of the activation history.
+                Defaults to ``history_length``.
+
+        Returns:
+            NodeGraph: The graph.
+        """
+        graph = cls([node.label for node in nodes], history_size)
+        index = {id(node): i for i, node in enumerate(nodes)}
+        for i, node in enumerate(nodes):
+            graph.activations[i] = node.activation
+            for connection in node.connections:
+                if id(connection.target_node) in index:
+                    graph.weights[i, index[id(connection.target_node)]] += connection.weight
+        return graph
+
+    def to_nodes(self):
+        """
+        Creates ``Node`` objects with the current activations and connections of the graph.
+
+        Returns:
+            list: The nodes, in the order of ``labels``.
+        """
+        nodes = [Node(label) for label in self.labels]
+        for node, activation in zip(nodes, self.activations):
+            node.activation = float(activation)
+        for source, target in zip(*np.nonzero(self.weights)):
+            nodes[source].add_connection(nodes[target], float(self.weights[source, target]))
+        return nodes
+
+    def add_connection(self, source, target, weight=None):
+        """
+        Connects two nodes, given by label or index.
+
+        Args:
+            source (str or int): The node the connection starts at.
+            target (str or int): The node the connection points to.
+            weight (float, optional): The weight of the connection. Defaults to a random
+                value between 0.1 and 1.0.
+        """
+        source = self.labels.index(source) if isinstance(source, str) else source
+        target = self.labels.index(target) if isinstance(target, str) else target
+        self.weights[source, target] = weight if weight is not None else random.uniform(0.1, 1.0)
+
+    def propagate(self, input_signals):
+        """
+        Propagates one input signal per node through the graph, see ``propagate_steps``.
+
+        Args:
+            input_signals (array_like): One input signal per node, NaN for nodes that do
+                not receive a signal.
+
+        Returns:
+            np.ndarray: The activations after propagation.
+        """
+        return self.propagate_steps(np.asarray(input_signals, dtype=np.float64)[None])[-1]
+
+    def propagate_steps(self, input_signals):
+        """
+        Propagates a sequence of input signals with one matrix product for all steps.
+
+        Like ``Node.propagate_signal``, a node that receives a signal sets its activation
+        to ``max(0, signal)``, dropping what it had accumulated, and adds its activation
+        times the weight to every node it is connected to. Within a step the nodes fire in
+        index order, so a node keeps the contributions of the nodes after it (and its own
+        self-connection) and loses those of the nodes before it. A node without a signal
+        (NaN) keeps its activation from the previous step and accumulates all
+        contributions. Self-connections are applied after the node's other connections,
+        which matches ``Node`` when the self-connection is its last connection.
+
+        Args:
+            input_signals (array_like): An array of shape (steps, nodes).
+
+        Returns:
+            np.ndarray: The activations after every step, of shape (steps, nodes).
+        """
+        signals = np.asarray(input_signals, dtype=np.float64).reshape(-1, len(self.labels))
+        received = ~np.isnan(signals)
+        rectified = np.where(received, np.maximum(signals, 0), 0.0)
+        # Was nach dem eigenen Feuern noch ankommt (Knoten ab dem eigenen Index) bzw. alles
+        reset_values = rectified + rectified @ np.tril(self.weights)
+        increments = np.cumsum(np.where(received, 0.0, rectified @ self.weights), axis=0)
+        # Jeder Knoten startet beim letzten eigenen Signal (oder der Ausgangsaktivierung)
+        # und summiert die Beiträge der Schritte danach auf
+        offsets = np.vstack([self.activations[None], np.where(received, reset_values - increments, 0.0)])
+        last_reset = np.maximum.accumulate(np.where(received, np.arange(1, len(signals) + 1)[:, None], 0), axis=0)
+        outputs = np.take_along_axis(offsets, last_reset, axis=0) + increments
+        self.record(outputs)
+        if len(outputs):
+            self.activations = outputs[-1].copy()
+        return outputs
+
+    def record(self, rows):
+        """
+        Appends activation rows to the ring buffer, overwriting the oldest entries.
+        """
+        capacity = len(self.history)
+        if capacity == 0:
+            return
+        skipped = max(0, len(rows) - capacity)
+        positions = (self.history_count + skipped + np.arange(len(rows) - skipped)) % capacity
+        self.history[positions] = rows[skipped:]
+        self.history_count += len(rows)
+
+    @property
+    def activation_history(self):
+        """
+        np.ndarray: The recorded activations, oldest first, of shape (steps, nodes).
+        """
+        capacity = len(self.history)
+        if self.history_count <= capacity:
+            return self.history[:self.history_count].copy()
+        return np.roll(self.history, -(self.history_count % capacity), axis=0)
+
 # ---------------------------
-# Funktionen zur Texturerzeugung
+# Profiling
 # ---------------------------
 
-resolutions = {
-    "HD": (1280, 720),
-    "Full HD": (1920, 1080),
-    "2K": (2048, 2048),
-    "4K": (5760, 5760),
-    "8K": (10670, 10670),
-    "Cover": (1024, 1024)
-}
+def peak_rss(children=False):
+    """
+    Returns the peak resident set size of this process.
 
-def save_image(image_tensor, filename, resolution):
+    Args:
+        children (bool, optional): Whether to return the peak of the largest terminated
+            child process instead, e.g. of the worker pool. Defaults to False.
+
+    Returns:
+        int: The peak resident set size in bytes, or None where it is not available.
     """
-    Saves an image tensor to a file.
+    if resource is None:
+        return None
+    # ru_maxrss ist unter Linux in KiB, unter macOS in Bytes angegeben
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    return usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+class Profiler:
+    """
+    Records wall time, CPU time and peak memory for each stage of the texture pipeline.
+
+    Stages with the same name (e.g. the same map in every tile) are aggregated. Memory is
+    measured with tracemalloc, which is only active while the profiler is used as a context
+    manager; the peak is process-wide and relative to the memory in use when the stage
+    started. CPU time is the CPU time of the whole process.
+
+    The tracemalloc peak cannot be split by thread, so only stages of the owning thread
+    (the one that entered the profiler, or created it) track memory. Stages that run
+    concurrently in other threads, such as the ``write.*`` stages of ``TextureWriter``,
+    record ``peak_memory`` as None, and their allocations count towards the peaks of the
+    owning thread's stages that run at the same time.
+
+    Attributes:
+        trace_memory (bool): Whether to trace memory while the profiler is active.
+        stages (dict): The aggregated measurements, keyed by stage name.
+        owner (int): The ident of the thread whose stages track memory.
+    """
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.started_tracing = False
+        self.owner = threading.get_ident()
+        self.start_time = time.perf_counter()
+
+    def __enter__(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        self.owner = threading.get_ident()
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def stage(self, name):
+        """
+        Returns a context manager that measures one execution of a stage.
+
+        Args:
+            name (str): The stage name.
+
+        Returns:
+            contextlib.AbstractContextManager: The measuring context.
+        """
+        return ProfilerStage(self, name)
+
+    def record(self, name, wall_time, cpu_time, peak_memory):
+        """
+        Adds one measurement to the aggregated stage statistics.
+        """
+        with self.lock:
+            stage = self.stages.setdefault(name, {"calls": 0, "wall_time": 0.0, "cpu_time": 0.0, "peak_memory": None})
+            stage["calls"] += 1
+            stage["wall_time"] += wall_time
+            stage["cpu_time"] += cpu_time
+            if peak_memory is not None:
+                stage["peak_memory"] = max(stage["peak_memory"] or 0, peak_memory)
+
+    def report(self):
+        """
+        Returns the collected measurements as a structured report.
+
+        Returns:
+            dict: The stages in the order they first ran, the total wall time since the
+            profiler started and the peak resident set size of the process in bytes.
+        """
+        with self.lock:
+            stages = {name: dict(stage) for name, stage in self.stages.items()}
+        return {"stages": stages, "wall_time": time.perf_counter() - self.start_time, "peak_rss": peak_rss()}
+
+    def log_json(self, **fields):
+        """
+        Logs the report as a single JSON line on the "texturelab" logger.
+
+        Args:
+            **fields: Additional fields for the log line, e.g. a job id.
+        """
+        logger.info(json.dumps({**fields, **self.report()}))
+
+class ProfilerStage:
+    """
+    Context manager measuring one execution of a profiler stage.
+    """
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        stack = self.profiler.local.__dict__.setdefault("stack", [])
+        # Andere Threads würden die prozessweite Spitze zurücksetzen und fremde Allokationen mitzählen
+        self.traced = tracemalloc.is_tracing() and threading.get_ident() == self.profiler.owner
+        if self.traced:
+            current, peak = tracemalloc.get_traced_memory()
+            # Die Spitze der umgebenden Stufen sichern, bevor sie zurückgesetzt wird
+            for outer in stack:
+                outer.peak = max(outer.peak, peak)
+            tracemalloc.reset_peak()
+            self.start_memory = current
+            self.peak = current
+        stack.append(self)
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall_time = time.perf_counter() - self.start_wall
+        cpu_time = time.process_time() - self.start_cpu
+        stack = self.profiler.local.stack
+        stack.pop()
+        peak_memory = None
+        if self.traced and tracemalloc.is_tracing():
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            peak_memory = self.peak - self.start_memory
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, self.peak)
+        self.profiler.record(self.name, wall_time, cpu_time, peak_memory)
+
+class NullProfiler:
+    """
+    Profiler that records nothing, used when profiling is disabled.
+    """
+    def stage(self, name):
+        return nullcontext()
+
+    def report(self):
+        return {}
+
+null_profiler = NullProfiler()
+
+active_profiler = contextvars.ContextVar("active_profiler", default=null_profiler)
+
+def profile_stage(name):
+    """
+    Measures a stage with the profiler of the running job, or does nothing without one.
 
     Args:
-        image_tensor (torch.Tensor): The image tensor to save.
-        filename (str): The filename to save the image to.
-        resolution (str): The resolution of the image.
+        name (str): The stage name.
+
+    Returns:
+        contextlib.AbstractContextManager: The measuring context.
     """
-    width, height = resolutions.get(resolution, (1920, 1080))
-    image = Image.fromarray((image_tensor.numpy().transpose(1, 2, 0) * 255).astype(np.uint8))
-    image = image.resize((width, height), Image.Resampling.LANCZOS)
-    image.save(filename, format='PNG')
+    return active_profiler.get().stage(name)
+
+# ---------------------------
+# Persistenter Worker-Pool
+# ---------------------------
 
-def generate_texture_with_network(image, category_nodes, resolution):
+_worker_pool = None
+_worker_pool_size = 0
+_worker_pool_users = 0
+_worker_pool_lock = threading.Condition()
+
+def _start_worker_pool(processes):
+    # Wird mit gehaltenem Lock aufgerufen
+    global _worker_pool, _worker_pool_size
+    if _worker_pool is not None and processes not in (None, _worker_pool_size):
+        # Ein Neustart wartet, bis kein anderer Thread den laufenden Pool mehr benutzt
+        while _worker_pool_users:
+            _worker_pool_lock.wait()
+        _worker_pool.close()
+        _worker_pool.join()
+        _worker_pool = None
+    if _worker_pool is None:
+        if os.name == "posix":
+            # Die Worker sollen den Resource-Tracker des Elternprozesses erben, damit
+            # angehängte Shared-Memory-Blöcke nur einmal verwaltet werden
+            resource_tracker.ensure_running()
+        _worker_pool_size = processes or multiprocessing.cpu_count()
+        _worker_pool = multiprocessing.Pool(_worker_pool_size)
+    return _worker_pool, _worker_pool_size
+
+def get_worker_pool(processes=None):
     """
-    Generates a texture using a neural network.
+    Returns the long-lived worker pool of this process, starting it on first use.
 
     Args:
-        image (PIL.Image): The input image.
-        category_nodes (list): A list of category nodes.
-        resolution (str): The resolution of the output image.
+        processes (int, optional): The number of worker processes. If given and different
+            from the running pool, the pool is restarted with the new size once no
+            ``borrow_worker_pool`` block uses it. Defaults to the size of the running pool,
+            or ``multiprocessing.cpu_count()`` on first use.
 
     Returns:
-        torch.Tensor: The generated image tensor.
+        tuple: The shared worker pool and its number of processes, read together under
+        the pool lock.
     """
-    width, height = resolutions.get(resolution, (1024, 1024))
-    image = image.resize((width, height), Image.Resampling.LANCZOS)
-    image_array = np.array(image) / 255.0
-    image_tensor = torch.tensor(image_array, dtype=torch.float32).permute(2, 0, 1)
+    with _worker_pool_lock:
+        return _start_worker_pool(processes)
+
+@contextmanager
+def borrow_worker_pool():
+    """
+    Uses the worker pool for a block, keeping it from being restarted meanwhile.
+
+    Yields:
+        tuple: The shared worker pool and its number of processes, see ``get_worker_pool``.
+    """
+    global _worker_pool_users
+    with _worker_pool_lock:
+        pool_and_size = _start_worker_pool(None)
+        _worker_pool_users += 1
+    try:
+        yield pool_and_size
+    finally:
+        with _worker_pool_lock:
+            _worker_pool_users -= 1
+            _worker_pool_lock.notify_all()
 
-    pool = multiprocessing.Pool()
-    chunk_size = image_tensor.shape[1] // multiprocessing.cpu_count()
-    chunks = [(image_tensor, i, chunk_size, category_nodes) for i in range(0, image_tensor.shape[1], chunk_size)]
-    results = pool.map(ImageNode("Temp").process_chunk, chunks)
+@atexit.register
+def shutdown_worker_pool():
+    """
+    Stops the worker pool if it has been started.
+    """
+    global _worker_pool, _worker_pool_size
+    with _worker_pool_lock:
+        if _worker_pool is not None:
+            _worker_pool.close()
+            _worker_pool.join()
+            _worker_pool = None
+            _worker_pool_size = 0
 
-    pool.close()
-    pool.join()
+def chunk_bounds(height, parts):
+    """
+    Splits a number of rows into contiguous bands of near-equal size.
 
-    for start_row, modified_chunk in results:
-        image_tensor[:, start_row:start_row + modified_chunk.shape[1], :] = modified_chunk
+    The first ``height % parts`` bands get one extra row, so there is no short tail chunk
+    and no empty band, even if ``height`` is smaller than ``parts``.
 
-    return image_tensor
+    Args:
+        height (int): The number of rows to split.
+        parts (int): The desired number of bands.
 
-def process_texture(image, strength, scale, invert_specular, blur_radius, metallic_intensity, emission_intensity, opacity_threshold, invert_roughness, resolution):
+    Returns:
+        list: A list of ``(start_row, stop_row)`` tuples.
     """
-    Processes the input image to generate various texture maps.
+    parts = max(1, min(parts, height))
+    base, extra = divmod(height, parts)
+    bounds = []
+    start_row = 0
+    for i in range(parts):
+        stop_row = start_row + base + (1 if i < extra else 0)
+        bounds.append((start_row, stop_row))
+        start_row = stop_row
+    return bounds
+
+def process_shared_band(args):
+    """
+    Applies the category activations to one row band of an image in shared memory.
+
+    Runs inside a pool worker and writes the band in place, so nothing has to be sent back
+    to the parent process.
+
+    Args:
+        args (tuple): A tuple containing the shared memory name, the image shape, the
+            dtype, the start row, the stop row and the category nodes.
+    """
+    shm_name, shape, dtype, start_row, stop_row, category_nodes = args
+    shm = shared_memory.SharedMemory(name=shm_name)
+    image_array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    try:
+        apply_category_activations(image_array[start_row:stop_row], category_nodes)
+    finally:
+        del image_array
+        shm.close()
+
+# ---------------------------
+# Ergebnis-Cache
+# ---------------------------
+
+class NetworkCache:
+    """
+    Caches network stage results with LRU eviction and a memory budget.
+
+    The cache stores read-only copies of the normal maps, because they are shared between
+    all callers that hit the same entry. The arrays passed to ``put`` stay writable.
+
+    Attributes:
+        memory_budget (int): The maximum total size of the cached arrays in bytes.
+        entries (OrderedDict): The cached arrays, least recently used first.
+        size (int): The current total size of the cached arrays in bytes.
+        hits (int): The number of successful lookups.
+        misses (int): The number of failed lookups.
+    """
+    def __init__(self, memory_budget=512 * 1024 * 1024):
+        self.memory_budget = memory_budget
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Looks up a cached array and marks it as most recently used.
+
+        Args:
+            key (tuple): The cache key, see ``network_cache_key``.
+
+        Returns:
+            np.ndarray: The cached array, or None if there is no entry for the key.
+        """
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Stores a read-only copy of an array and evicts the least recently used entries
+        beyond the budget.
+
+        Arrays larger than the whole budget are not cached.
+
+        Args:
+            key (tuple): The cache key, see ``network_cache_key``.
+            value (np.ndarray): The array to cache.
+        """
+        if value.nbytes > self.memory_budget:
+            return
+        value = value.copy()
+        value.flags.writeable = False
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous.nbytes
+            self.entries[key] = value
+            self.size += value.nbytes
+            while self.size > self.memory_budget:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted.nbytes
+
+    def clear(self):
+        """
+        Removes all entries and resets the counters.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Returns the current cache counters.
+
+        Returns:
+            dict: The number of hits, misses and entries and the cached bytes.
+        """
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries), "bytes": self.size}
+
+network_cache = NetworkCache()
+
+def image_hash(image):
+    """
+    Computes a content hash of an image, including its mode and size.
+
+    Args:
+        image (PIL.Image): The image to hash.
+
+    Returns:
+        str: The hexadecimal hash.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{image.mode}:{image.size}".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+def network_cache_key(image, resolution, category_nodes, precision="float32"):
+    """
+    Builds the cache key of a network stage result.
 
     Args:
         image (PIL.Image): The input image.
-        strength (float): The strength of the normal map.
-        scale (float): The scale of the height map.
-        invert_specular (bool): Whether to invert the specular map.
-        blur_radius (int): The blur radius for the ambient occlusion map.
-        metallic_intensity (float): The intensity of the metallic map.
-        emission_intensity (float): The intensity of the emission map.
-        opacity_threshold (int): The threshold for the opacity map.
-        invert_roughness (bool): Whether to invert the roughness map.
-        resolution (str): The resolution of the output images.
+        resolution (str): The resolution of the output image.
+        category_nodes (list): The category nodes with their activations.
+        precision (str, optional): The precision of the network stage. Defaults to "float32".
 
     Returns:
-        dict: A dictionary containing the generated texture maps.
+        tuple: The image hash, the resolution, the node activations and the precision.
     """
-    image_array = np.array(image)
+    return (image_hash(image), resolution, tuple(node.activation for node in category_nodes), precision)
 
-    category_nodes = [Node(label) for label in ["Rot", "Grün", "Blau", "Gelb", "Cyan", "Magenta"]]
-    for node in category_nodes:
-        node.activation = random.uniform(0.2, 1.0)
+# ---------------------------
+# Auslagerung in Scratch-Dateien
+# ---------------------------
 
-    # Normal Map Processing
-    normal_map_tensor = generate_texture_with_network(image, category_nodes, resolution)
-    normal_map = (normal_map_tensor.numpy().transpose(1, 2, 0) * 255).astype(np.uint8)
+# Kachelbudget im Out-of-core-Modus, wenn kein eigenes angegeben ist
+scratch_tile_budget = 64 * 1024 ** 2
 
-    # Specular Map
-    specular_map_tensor = generate_texture_with_network(image, category_nodes, resolution)
-    specular_map = 255 - (specular_map_tensor.numpy().transpose(1, 2, 0) * 255).astype(np.uint8) if invert_specular else (specular_map_tensor.numpy().transpose(1, 2, 0) * 255).astype(np.uint8)
+def scratch_array(shape, dtype, scratch_dir=None):
+    """
+    Creates an array backed by a memory-mapped temporary file instead of RAM.
+
+    The file has no name on POSIX systems and is removed as soon as the array is released.
 
-    # Ambient Occlusion Map
-    ao_map = cv2.GaussianBlur(normal_map, (blur_radius, blur_radius), 0)
+    Args:
+        shape (tuple): The shape of the array.
+        dtype (type): The type of the array.
+        scratch_dir (str, optional): The folder of the temporary file. Defaults to None,
+            which uses the system temporary folder.
 
-    # Metallic Map
-    metallic_map = (normal_map * metallic_intensity).astype(np.uint8)
+    Returns:
+        np.ndarray: The zero-filled array, its ``base`` is the ``mmap.mmap`` of the file.
+    """
+    size = max(1, math.prod(shape) * np.dtype(dtype).itemsize)
+    with tempfile.TemporaryFile(dir=scratch_dir) as scratch_file:
+        scratch_file.truncate(size)
+        buffer = mmap.mmap(scratch_file.fileno(), size)
+    return np.ndarray(shape, dtype=dtype, buffer=buffer)
 
-    # Emission Map
-    emission_map = (normal_map * emission_intensity).astype(np.uint8)
+def release_scratch_rows(array, start_row=0, stop_row=None):
+    """
+    Writes rows of a scratch array back to its file and drops them from resident memory.
 
-    # Opacity Map
-    _, opacity_map = cv2.threshold(normal_map, opacity_threshold, 255, cv2.THRESH_BINARY)
+    The data stays available, later reads page it back in from the file. Arrays that are
+    not backed by ``scratch_array`` are left alone.
 
-    # Roughness Map
-    roughness_map = 255 - normal_map if invert_roughness else normal_map
+    Args:
+        array (np.ndarray): The array.
+        start_row (int, optional): The first row to release. Defaults to 0.
+        stop_row (int, optional): The row after the last one to release. Defaults to all rows.
+    """
+    buffer = array.base
+    if not isinstance(buffer, mmap.mmap) or not array.flags.c_contiguous:
+        return
+    stop_row = len(array) if stop_row is None else stop_row
+    row_bytes = array[:1].nbytes
+    # Auf ganze Seiten ausweiten; Nachbarzeilen bleiben in der gemeinsamen Abbildung erhalten
+    start = start_row * row_bytes // mmap.ALLOCATIONGRANULARITY * mmap.ALLOCATIONGRANULARITY
+    stop = min(stop_row * row_bytes, len(buffer))
+    if stop <= start:
+        return
+    buffer.flush(start, stop - start)
+    if hasattr(mmap, "MADV_DONTNEED"):
+        buffer.madvise(mmap.MADV_DONTNEED, start, stop - start)
 
-    # Save Textures
-    output_dir = "output_textures"
-    os.makedirs(output_dir, exist_ok=True)
+def copy_image_to_scratch(image, scratch_dir=None):
+    """
+    Copies a PIL image into a scratch array band by band, without a full in-memory copy.
 
-    cv2.imwrite(os.path.join(output_dir, f"normal_map_{resolution}.png"), normal_map)
-    cv2.imwrite(os.path.join(output_dir, f"specular_map_{resolution}.png"), specular_map)
-    cv2.imwrite(os.path.join(output_dir, f"ao_map_{resolution}.png"), ao_map)
-    cv2.imwrite(os.path.join(output_dir, f"metallic_map_{resolution}.png"), metallic_map)
-    cv2.imwrite(os.path.join(output_dir, f"emission_map_{resolution}.png"), emission_map)
-    cv2.imwrite(os.path.join(output_dir, f"opacity_map_{resolution}.png"), opacity_map)
-    cv2.imwrite(os.path.join(output_dir, f"roughness_map_{resolution}.png"), roughness_map)
+    Args:
+        image (PIL.Image): The image.
+        scratch_dir (str, optional): The folder of the scratch file. Defaults to None.
 
-    return {
-        "Normal Map": normal_map,
-        "Specular Map": specular_map,
-        "AO Map": ao_map,
-        "Metallic Map": metallic_map,
-        "Emission Map": emission_map,
-        "Opacity Map": opacity_map,
-        "Roughness Map": roughness_map
-    }
+    Returns:
+        np.ndarray: The image as a scratch array, shaped like ``np.asarray(image)``.
+    """
+    width, height = image.size
+    first_row = np.asarray(image.crop((0, 0, width, 1)))
+    array = scratch_array((height,) + first_row.shape[1:], first_row.dtype, scratch_dir)
+    rows, starts = row_blocks(height, first_row.nbytes, 8 * 1024 ** 2)
+    for start_row in starts:
+        stop_row = min(start_row + rows, height)
+        array[start_row:stop_row] = np.asarray(image.crop((0, start_row, width, stop_row)))
+        release_scratch_rows(array, start_row, stop_row)
+    return array
 
 # ---------------------------
-# Gradio Interface
+# Ausgabe der Texturkarten
 # ---------------------------
 
-def process_and_display(image, resolution, strength, scale, invert_specular, blur_radius, metallic_intensity, emission_intensity, opacity_threshold, invert_roughness):
+output_formats = {
+    "png": ".png",
+    "tiff": ".tiff",
+    "tga": ".tga",
+    "qoi": ".qoi"
+}
+
+def encode_texture(path, image, output_format="png", png_compression=1):
     """
-    Processes the input image and displays the generated texture maps.
+    Encodes a texture map and writes it to a file.
+
+    PNG and uncompressed TIFF are written with OpenCV, TGA and QOI with Pillow. The channel
+    order on disk is the same for all formats. QOI only stores RGB and RGBA, so grayscale
+    maps are written as three equal channels.
 
     Args:
-        image (PIL.Image): The input image.
-        resolution (str): The resolution of the output images.
-        strength (float): The strength of the normal map.
-        scale (float): The scale of the height map.
-        invert_specular (bool): Whether to invert the specular map.
-        blur_radius (int): The blur radius for the ambient occlusion map.
-        metallic_intensity (float): The intensity of the metallic map.
-        emission_intensity (float): The intensity of the emission map.
-        opacity_threshold (int): The threshold for the opacity map.
-        invert_roughness (bool): Whether to invert the roughness map.
+        path (str): The file to write.
+        image (np.ndarray): The texture map.
+        output_format (str, optional): One of ``output_formats``. Defaults to "png".
+        png_compression (int, optional): The PNG compression level from 0 (fastest) to 9
+            (smallest). Defaults to 1.
 
     Returns:
-        tuple: A tuple containing the generated texture maps as PIL images.
+        str: The written path.
     """
-    textures = process_texture(image, strength, scale, invert_specular, blur_radius, metallic_intensity, emission_intensity, opacity_threshold, invert_roughness, resolution)
-    output_dir = "output_textures"
-    return (Image.fromarray(textures["Normal Map"]),
-            Image.fromarray(textures["Specular Map"]),
-            Image.fromarray(textures["AO Map"]),
-            Image.fromarray(textures["Metallic Map"]),
-            Image.fromarray(textures["Emission Map"]),
-            Image.fromarray(textures["Opacity Map"]),
-            Image.fromarray(textures["Roughness Map"]))
+    if output_format == "png":
+        written = cv2.imwrite(path, image, [cv2.IMWRITE_PNG_COMPRESSION, png_compression])
+    elif output_format == "tiff":
+        # 1 = COMPRESSION_NONE
+        written = cv2.imwrite(path, image, [cv2.IMWRITE_TIFF_COMPRESSION, 1])
+    elif output_format in ("tga", "qoi"):
+        if output_format == "qoi" and (image.ndim == 2 or image.shape[2] == 1):
+            image = np.repeat(image.reshape(image.shape[:2] + (1,)), 3, axis=2)
+        # OpenCV schreibt die Kanäle in umgekehrter Reihenfolge, Pillow nicht
+        if image.ndim == 3 and image.shape[2] >= 3:
+            image = np.concatenate([image[..., 2::-1], image[..., 3:]], axis=2)
+        Image.fromarray(image).save(path, format=output_format.upper())
+        written = True
+    else:
+        raise ValueError(f"Unknown output format '{output_format}', expected one of {list(output_formats)}")
+    if not written:
+        raise OSError(f"Could not write {path}")
+    return path
+
+# Manifest im Ausgabeordner, aus dem z. B. das Unreal-Skript geänderte Karten erkennt
+manifest_name = "texturelab_manifest.json"
+_manifest_lock = threading.Lock()
+
+def file_sha256(path):
+    """
+    Computes the SHA-256 hash of a file.
+
+    Args:
+        path (str): The file.
+
+    Returns:
+        str: The hexadecimal hash.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as hashed_file:
+        for block in iter(lambda: hashed_file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def update_manifest(output_dir, entries):
+    """
+    Merges file entries into the manifest of an output folder.
 
-with gr.Blocks() as demo:
-    gr.Markdown("### Textur-Generator mit neuronaler Netzwerk-Verarbeitung")
-
-    with gr.Row():
-        with gr.Column():
-            input_image = gr.Image(label="Input Texture", type="pil")
-            resolution_dropdown = gr.Dropdown(label="Auflösung", choices=list(resolutions.keys()), value="Full HD")
-            strength_slider = gr.Slider(label="Normal Map Strength", minimum=1, maximum=10, step=1, value=5)
-            scale_slider = gr.Slider(label="Height Map Scale", minimum=0.1, maximum=3.0, step=0.1, value=1.0)
-            invert_specular_checkbox = gr.Checkbox(label="Invert Specular Map", value=False)
-            blur_radius_slider = gr.Slider(label="Ambient Occlusion Blur Radius", minimum=1, maximum=31, step=2, value=5)
-            metallic_slider = gr.Slider(label="Metallic Intensity", minimum=0.1, maximum=3.0, step=0.1, value=1.0)
-            emission_slider = gr.Slider(label="Emission Intensity", minimum=0.1, maximum=3.0, step=0.1, value=1.0)
-            opacity_slider = gr.Slider(label="Opacity Threshold", minimum=0, maximum=255, step=1, value=128)
-            invert_roughness_checkbox = gr.Checkbox(label="Invert Roughness Map", value=False)
-
-        with gr.Column():
-            normal_preview = gr.Image(label="Normal Map")
-            specular_preview = gr.Image(label="Specular Map")
-            ao_preview = gr.Image(label="Ambient Occlusion Map")
-            metallic_preview = gr.Image(label="Metallic Map")
-            emission_preview = gr.Image(label="Emission Map")
-            opacity_preview = gr.Image(label="Opacity Map")
-            roughness_preview = gr.Image(label="Roughness Map")
-
-    process_button = gr.Button("Texturen generieren")
-
-    process_button.click(
-        process_and_display,
-        inputs=[input_image, resolution_dropdown, strength_slider, scale_slider, invert_specular_checkbox, blur_radius_slider, metallic_slider, emission_slider, opacity_slider, invert_roughness_checkbox],
-        outputs=[normal_preview, specular_preview, ao_preview, metallic_preview, emission_preview, opacity_preview, roughness_preview]
-    )
+    The manifest maps every file name to its entry. Entries of other files are kept, so
+    several resolutions can share one folder. The file is replaced atomically.
+
+    Args:
+        output_dir (str): The folder holding the manifest and the files.
+        entries (dict): The new entries, keyed by file name.
+
+    Returns:
+        str: The path of the manifest.
+    """
+    path = os.path.join(output_dir, manifest_name)
+    with _manifest_lock:
+        try:
+            with open(path, encoding="utf-8") as manifest_file:
+                manifest = json.load(manifest_file)
+        except (OSError, ValueError):
+            manifest = {"version": 1, "files": {}}
+        manifest["files"].update(entries)
+        with open(path + ".tmp", "w", encoding="utf-8") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+        os.replace(path + ".tmp", path)
+    return path
+
+class TextureWriter:
+    """
+    Encodes and writes texture maps concurrently in a thread pool.
+
+    OpenCV releases the GIL while encoding, so several maps are encoded at the same time.
+    ``write`` returns immediately; ``wait`` blocks until all submitted files are on disk.
+    The arrays must not be modified until they have been written.
+
+    Attributes:
+        output_format (str): One of ``output_formats``.
+        png_compression (int): The PNG compression level from 0 (fastest) to 9 (smallest).
+        executor (ThreadPoolExecutor): The encoder threads.
+        futures (list): The pending writes.
+    """
+    def __init__(self, output_format="png", png_compression=1, max_workers=None):
+        if output_format not in output_formats:
+            raise ValueError(f"Unknown output format '{output_format}', expected one of {list(output_formats)}")
+        self.output_format = output_format
+        self.png_compression = png_compression
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.futures = []
+
+    @property
+    def extension(self):
+        """
+        str: The file extension of the output format, including the dot.
+        """
+        return output_formats[self.output_format]
+
+    def write(self, path, image):
+        """
+        Schedules a texture map for encoding and writing.
+
+        Args:
+            path (str): The file to write.
+            image (np.ndarray): The texture map.
+
+        Returns:
+            concurrent.futures.Future: A future resolving to the written path.
+        """
+        profiler = active_profiler.get()
+        future = self.executor.submit(self.encode, profiler, path, image)
+        self.futures.append(future)
+        return future
+
+    def encode(self, profiler, path, image):
+        """
+        Encodes one texture map inside an encoder thread, measured by the job's profiler.
+        """
+        with profiler.stage(f"write.{os.path.basename(path)}"):
+            try:
+                return encode_texture(path, image, self.output_format, self.png_compression)
+            finally:
+                # Ausgelagerte Karten nach dem Kodieren wieder aus dem Speicher entfernen
+                release_scratch_rows(image)
+
+    def write_manifest(self, output_dir, files, fields):
+        """
+        Schedules a manifest update for files once they have been written.
+
+        Args:
+            output_dir (str): The folder of the manifest, see ``update_manifest``.
+            files (dict): For every map name a tuple of the future returned by ``write`` and
+                a dictionary of per-file fields.
+            fields (dict): Fields shared by all entries, e.g. the map parameters.
+
+        Returns:
+            concurrent.futures.Future: A future resolving to the manifest path.
+        """
+        def record():
+            entries = {}
+            for name, (future, file_fields) in files.items():
+                path = future.result()
+                entries[os.path.basename(path)] = {"map": name, "sha256": file_sha256(path), "size": os.path.getsize(path), **file_fields, **fields}
+            return update_manifest(output_dir, entries)
+
+        # Läuft nach den Schreibaufträgen, die vor ihm eingereiht wurden
+        future = self.executor.submit(record)
+        self.futures.append(future)
+        return future
+
+    def wait(self):
+        """
+        Blocks until all scheduled writes are finished.
+
+        Returns:
+            list: The written paths in the order they were scheduled.
+
+        Raises:
+            Exception: The first error raised by one of the writes.
+        """
+        futures, self.futures = self.futures, []
+        return [future.result() for future in futures]
+
+    def close(self):
+        """
+        Waits for the pending writes and stops the encoder threads.
+        """
+        try:
+            self.wait()
+        finally:
+            self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+# ---------------------------
+# Funktionen zur Texturerzeugung
+# ---------------------------
+
+resolutions = {
+    "HD": (1280, 720),
+    "Full HD": (1920, 1080),
+    "2K": (2048, 2048),
+    "4K": (5760, 5760),
+    "8K": (10670, 10670),
+    "Cover": (1024, 1024)
+}
+
+texture_backends = ("vectorized", "multiprocessing", "torch")
+
+# Datentyp der Netzwerkstufe je Genauigkeit. "float32" entspricht bitgenau der bisherigen
+# Rechnung, "uint8" ebenso über eine Tabelle, "float16" halbiert den Speicher auf Kosten
+# von Rundungsabweichungen
+precisions = {
+    "float32": np.float32,
+    "float16": np.float16,
+    "uint8": np.uint8
+}
+
+def save_image(image_tensor, filename, resolution):
+    """
+    Saves an image tensor to a file.
+
+    Args:
+        image_tensor (torch.Tensor): The image tensor to save.
+        filename (str): The filename to save the image to.
+        resolution (str): The resolution of the image.
+    """
+    width, height = resolutions.get(resolution, (1920, 1080))
+    image_array = image_tensor.numpy().transpose(1, 2, 0)
+    image = Image.fromarray(image_array if image_array.dtype == np.uint8 else (image_array * 255).astype(np.uint8))
+    image = image.resize((width, height), Image.Resampling.LANCZOS)
+    image.save(filename, format='PNG')
+
+def apply_category_activations(image_array, category_nodes):
+    """
+    Applies the category node activations to the whole image array at once.
+
+    This is the vectorized counterpart of ``ImageNode.process_chunk``: each node adds
+    ``activation * 0.1`` to every pixel in the same order as the per-pixel loop and the
+    result is clamped to [0, 1] afterwards, so both produce bit-identical float32 values.
+
+    Args:
+        image_array (np.ndarray): The float32 image array, modified in place.
+        category_nodes (list): A list of category nodes.
+
+    Returns:
+        np.ndarray: The modified image array.
+    """
+    for node in category_nodes:
+        image_array += node.activation * 0.1
+    np.clip(image_array, 0, 1, out=image_array)
+    return image_array
+
+def to_unit_range(image_array, dtype=np.float32, out=None):
+    """
+    Converts an image array to values in [0, 1] without a float64 intermediate.
+
+    Args:
+        image_array (np.ndarray): A uint8 image, which is divided by 255 directly in
+            ``dtype``, or a float image in [0, 1], which is copied into ``dtype``.
+        dtype (type, optional): The float type of the result. Defaults to np.float32.
+        out (np.ndarray, optional): The array to write the result to. Defaults to None,
+            which allocates a new one.
+
+    Returns:
+        np.ndarray: The converted image.
+    """
+    out = np.empty(image_array.shape, dtype=dtype) if out is None else out
+    if image_array.dtype == np.uint8:
+        np.divide(image_array, 255, out=out, dtype=dtype)
+    else:
+        out[...] = image_array
+    return out
+
+def network_lut(category_nodes):
+    """
+    Tabulates the network stage and the normal map conversion for all 256 input values.
+
+    Every output pixel only depends on the same input pixel and the activations, so looking
+    the input up gives exactly the normal map of the float32 pipeline.
+
+    Args:
+        category_nodes (list): A list of category nodes.
+
+    Returns:
+        np.ndarray: The 256-entry uint8 lookup table.
+    """
+    network_output = run_network_stage(np.arange(256, dtype=np.uint8), category_nodes)
+    return derive_normal_map(None, network_output)
+
+def run_network_stage(image_array, category_nodes, backend="vectorized", precision="float32"):
+    """
+    Runs the network stage on an already resized image array.
+
+    Args:
+        image_array (np.ndarray): The image as a uint8 (H, W, C) array, which is converted
+            straight into the working precision, or as a float array with values in [0, 1].
+        category_nodes (list): A list of category nodes.
+        backend (str, optional): "vectorized" applies the activations as whole-array
+            operations, "multiprocessing" splits the image into row bands that
+            the persistent worker pool processes in shared memory (the result is copied
+            out once, because the block is released before returning), "torch" runs the
+            whole-array operations with torch on the GPU if one is available.
+            Defaults to "vectorized".
+        precision (str, optional): A key of ``precisions``. "float32" and "float16"
+            compute in that type. "uint8" needs a uint8 image and maps it through
+            ``network_lut`` instead, which gives the float32 result already quantized to
+            the uint8 normal map values; the backend is not used then. Defaults to "float32".
+
+    Returns:
+        np.ndarray: The generated image as an (H, W, C) array of the precision's type,
+        with values in [0, 1] for the float types and in [0, 255] for "uint8".
+    """
+    if precision not in precisions:
+        raise ValueError(f"Unknown precision '{precision}', expected one of {list(precisions)}")
+    dtype = precisions[precision]
+
+    if precision == "uint8":
+        if image_array.dtype != np.uint8:
+            raise ValueError("The uint8 precision needs a uint8 image")
+        with profile_stage("network.activations"):
+            return cv2.LUT(image_array, network_lut(category_nodes))
+
+    if backend == "vectorized":
+        with profile_stage("network.convert"):
+            image_array = to_unit_range(image_array, dtype)
+        with profile_stage("network.activations"):
+            return apply_category_activations(image_array, category_nodes)
+
+    if backend == "torch":
+        import torch
+
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        with profile_stage("network.convert"):
+            image_tensor = torch.from_numpy(to_unit_range(image_array, dtype)).to(device)
+        with profile_stage("network.activations"):
+            for node in category_nodes:
+                image_tensor += node.activation * 0.1
+            image_tensor.clamp_(0, 1)
+        return image_tensor.cpu().numpy()
+
+    if backend == "multiprocessing":
+        shm = shared_memory.SharedMemory(create=True, size=max(1, image_array.size * np.dtype(dtype).itemsize))
+        shared_array = np.ndarray(image_array.shape, dtype=dtype, buffer=shm.buf)
+        try:
+            with profile_stage("network.convert"):
+                to_unit_range(image_array, dtype, out=shared_array)
+            with profile_stage("network.pool_startup"):
+                get_worker_pool()
+            with borrow_worker_pool() as (pool, pool_size), profile_stage("network.chunks"):
+                bands = chunk_bounds(image_array.shape[0], pool_size)
+                pool.map(process_shared_band, [(shm.name, image_array.shape, dtype, start_row, stop_row, category_nodes) for start_row, stop_row in bands])
+            # Die Worker schreiben nichts zurück, aber das Ergebnis muss den Block verlassen:
+            # SharedMemory.close() scheitert, solange ein Array auf seinen Puffer zeigt, und
+            # unter Windows verschwindet der Block mit dem letzten Handle
+            image_array = shared_array.copy()
+        finally:
+            del shared_array
+            shm.close()
+            shm.unlink()
+        return image_array
+
+    raise ValueError(f"Unknown backend '{backend}', expected one of {texture_backends}")
+
+def resize_to_resolution(image, resolution):
+    """
+    Resizes an image to the size of a named resolution.
+
+    Args:
+        image (PIL.Image): The input image.
+        resolution (str or tuple): The resolution, a key of ``resolutions`` or an explicit
+            ``(width, height)`` tuple. Unknown names fall back to 1024x1024.
+
+    Returns:
+        PIL.Image: The resized image.
+    """
+    width, height = resolution if isinstance(resolution, tuple) else resolutions.get(resolution, (1024, 1024))
+    return image.resize((width, height), Image.Resampling.LANCZOS)
+
+def preview_resolution(resolution, max_size=512):
+    """
+    Scales a resolution down so that its longer edge is at most ``max_size`` pixels.
+
+    Args:
+        resolution (str): The export resolution, a key of ``resolutions``.
+        max_size (int, optional): The maximum edge length of the preview. Defaults to 512.
+
+    Returns:
+        tuple: The preview size as ``(width, height)``, keeping the aspect ratio.
+    """
+    width, height = resolutions.get(resolution, (1024, 1024))
+    factor = min(1.0, max_size / max(width, height))
+    return (max(1, round(width * factor)), max(1, round(height * factor)))
+
+def create_category_nodes(seed=None):
+    """
+    Creates the category nodes with random activations.
+
+    Args:
+        seed (int, optional): Seed for the activations. The same seed always yields the
+            same activations. Defaults to None, which uses the global random state.
+
+    Returns:
+        list: A list of category nodes.
+    """
+    rng = random if seed is None else random.Random(seed)
+    category_nodes = [Node(label) for label in ["Rot", "Grün", "Blau", "Gelb", "Cyan", "Magenta"]]
+    for node in category_nodes:
+        node.activation = rng.uniform(0.2, 1.0)
+    return category_nodes
+
+def compute_network_array(image, category_nodes, resolution, backend="vectorized", precision="float32"):
+    """
+    Resizes the input image and runs the network stage on it.
+
+    Same as ``generate_texture_with_network``, but returns a NumPy array, so torch is only
+    loaded for the "torch" backend.
+
+    Args:
+        image (PIL.Image): The input image.
+        category_nodes (list): A list of category nodes.
+        resolution (str or tuple): The resolution of the output image.
+        backend (str, optional): The engine used to apply the activations, one of
+            ``texture_backends``. Defaults to "vectorized".
+        precision (str, optional): The working precision, a key of ``precisions``, see
+            ``run_network_stage``. Defaults to "float32".
+
+    Returns:
+        np.ndarray: The generated image as an (H, W, C) array of the precision's type.
+    """
+    image = resize_to_resolution(image, resolution)
+    # Direkt aus dem uint8-Puffer des Bildes umwandeln, ohne float64-Zwischenkopie
+    return run_network_stage(np.asarray(image), category_nodes, backend, precision)
+
+def generate_texture_with_network(image, category_nodes, resolution, backend="vectorized", precision="float32"):
+    """
+    Generates a texture using a neural network.
+
+    Args:
+        image (PIL.Image): The input image.
+        category_nodes (list): A list of category nodes.
+        resolution (str or tuple): The resolution of the output image.
+        backend (str, optional): The engine used to apply the activations, one of
+            ``texture_backends``. Defaults to "vectorized".
+        precision (str, optional): The working precision, a key of ``precisions``. With
+            "uint8" the tensor holds the quantized values in [0, 255]. Defaults to "float32".
+
+    Returns:
+        torch.Tensor: The generated image tensor.
+    """
+    import torch
+
+    return torch.from_numpy(compute_network_array(image, category_nodes, resolution, backend, precision)).permute(2, 0, 1)
+
+texture_maps = {
+    "normal": "Normal Map",
+    "specular": "Specular Map",
+    "ao": "AO Map",
+    "metallic": "Metallic Map",
+    "emission": "Emission Map",
+    "opacity": "Opacity Map",
+    "roughness": "Roughness Map"
+}
+
+packed_maps = {
+    "orm": "ORM Map",
+    "base": "Base Map"
+}
+
+map_labels = {**texture_maps, **packed_maps}
+
+def derive_source_image(params):
+    """
+    Resizes the input image in ``params`` to the requested resolution.
+    """
+    return np.asarray(resize_to_resolution(params["image"], params["resolution"]))
+
+def derive_network_output(params, source_image):
+    """
+    Runs the network stage on the resized source image.
+    """
+    return run_network_stage(source_image, params["category_nodes"], params["backend"], params["precision"])
+
+# Blockgröße der fusionierten Durchläufe, passt zusammen mit den Ausgaben in den L2-Cache
+fused_block_bytes = 64 * 1024
+
+def row_blocks(height, row_bytes, block_bytes=None):
+    """
+    Splits a number of rows into bands of about ``block_bytes`` each.
+
+    Args:
+        height (int): The number of rows.
+        row_bytes (int): The size of one row in bytes.
+        block_bytes (int, optional): The target band size in bytes. Defaults to
+            ``fused_block_bytes``.
+
+    Returns:
+        tuple: The band height in rows and a range of the start rows of the bands.
+    """
+    rows = max(1, (block_bytes or fused_block_bytes) // max(1, row_bytes))
+    return rows, range(0, height, rows)
+
+def derive_normal_map(params, network_output):
+    """
+    Converts the network output into the uint8 normal map.
+
+    Scales the output block by block in a small float buffer instead of a full-size
+    temporary, with the same float arithmetic as ``(network_output * 255).astype(np.uint8)``.
+    A uint8 network output is already the normal map.
+    """
+    if network_output.dtype == np.uint8:
+        return network_output
+    normal_map = np.empty(network_output.shape, dtype=np.uint8)
+    rows, starts = row_blocks(network_output.shape[0], network_output[:1].nbytes)
+    buffer = np.empty((rows,) + network_output.shape[1:], dtype=np.result_type(network_output, 255))
+    for start_row in starts:
+        block = network_output[start_row:start_row + rows]
+        scaled = buffer[:block.shape[0]]
+        np.multiply(block, 255, out=scaled)
+        normal_map[start_row:start_row + rows] = scaled
+    return normal_map
+
+def derive_specular_map(params, normal_map):
+    """
+    Derives the specular map, optionally inverted.
+    """
+    return 255 - normal_map if params["invert_specular"] else normal_map
+
+def derive_ao_map(params, normal_map):
+    """
+    Derives the ambient occlusion map by blurring the normal map.
+    """
+    return cv2.GaussianBlur(normal_map, (params["blur_radius"], params["blur_radius"]), 0)
+
+def derive_metallic_map(params, normal_map):
+    """
+    Derives the metallic map by scaling the normal map.
+    """
+    return (normal_map * params["metallic_intensity"]).astype(np.uint8)
+
+def derive_emission_map(params, normal_map):
+    """
+    Derives the emission map by scaling the normal map.
+    """
+    return (normal_map * params["emission_intensity"]).astype(np.uint8)
+
+def derive_opacity_map(params, normal_map):
+    """
+    Derives the binary opacity map by thresholding the normal map.
+    """
+    _, opacity_map = cv2.threshold(normal_map, params["opacity_threshold"], 255, cv2.THRESH_BINARY)
+    return opacity_map
+
+def derive_roughness_map(params, normal_map):
+    """
+    Derives the roughness map, optionally inverted.
+    """
+    return 255 - normal_map if params["invert_roughness"] else normal_map
+
+# Karten, deren Wert nur vom Wert des Normal-Map-Pixels abhängt
+pointwise_maps = {
+    "specular": derive_specular_map,
+    "metallic": derive_metallic_map,
+    "emission": derive_emission_map,
+    "opacity": derive_opacity_map,
+    "roughness": derive_roughness_map
+}
+
+def pointwise_lut(name, params):
+    """
+    Tabulates a pointwise map for all 256 values of a uint8 normal map pixel.
+
+    The table is computed with the map's own derive function, so looking a pixel up gives
+    exactly the value the derive function would compute for the whole image.
+
+    Args:
+        name (str): A key of ``pointwise_maps``.
+        params (dict): The map parameters.
+
+    Returns:
+        np.ndarray: The 256-entry uint8 lookup table, or None if the map equals the
+        normal map.
+    """
+    lut = pointwise_maps[name](params, np.arange(256, dtype=np.uint8))
+    return None if np.array_equal(lut, np.arange(256)) else lut
+
+def derive_pointwise_maps(params, normal_map):
+    """
+    Derives all requested pointwise maps in one pass over the normal map.
+
+    The normal map is read in cache-sized row bands and every map is written from the band
+    while it is still in cache, through its lookup table. No float temporaries are created
+    and maps that equal the normal map share its array, as the separate derive functions do.
+
+    Args:
+        params (dict): The map parameters. ``params["required"]`` limits the pass to the
+            maps some target depends on; without it all pointwise maps are derived.
+        normal_map (np.ndarray): The uint8 normal map.
+
+    Returns:
+        dict: The derived maps, keyed by map name.
+    """
+    names = [name for name in pointwise_maps if name in params.get("required", pointwise_maps)]
+    outputs = {}
+    luts = {}
+    for name in names:
+        lut = pointwise_lut(name, params)
+        if lut is None:
+            outputs[name] = normal_map
+        else:
+            outputs[name] = np.empty_like(normal_map)
+            luts[name] = lut
+
+    rows, starts = row_blocks(normal_map.shape[0], normal_map[:1].nbytes)
+    for start_row in starts:
+        block = normal_map[start_row:start_row + rows]
+        for name, lut in luts.items():
+            cv2.LUT(block, lut, dst=outputs[name][start_row:start_row + rows])
+    return outputs
+
+def to_grayscale(texture_map):
+    """
+    Converts an RGB texture map to a single channel, leaving single-channel maps unchanged.
+    """
+    return cv2.cvtColor(texture_map, cv2.COLOR_RGB2GRAY) if texture_map.ndim == 3 else texture_map
+
+def derive_orm_map(params, ao_map, roughness_map, metallic_map):
+    """
+    Packs ambient occlusion, roughness and metallic into the R, G and B channels.
+    """
+    return np.dstack([to_grayscale(ao_map), to_grayscale(roughness_map), to_grayscale(metallic_map)])
+
+def derive_base_map(params, source_image, opacity_map):
+    """
+    Packs the resized source image as base color with the opacity map as alpha channel.
+
+    The opacity map holds one binary threshold per color channel, but the alpha channel
+    feeds a single opacity mask. A pixel is opaque (255) if any channel passed the
+    threshold and transparent (0) otherwise, so the alpha stays binary.
+    """
+    base_color = source_image[..., :3] if source_image.ndim == 3 else np.dstack([source_image] * 3)
+    alpha = opacity_map.max(axis=2) if opacity_map.ndim == 3 else opacity_map
+    return np.dstack([base_color, alpha])
+
+# Jeder Knoten nennt seine Eingaben und die Funktion, die ihn aus diesen berechnet
+map_graph = {
+    "source": ((), derive_source_image),
+    "network": (("source",), derive_network_output),
+    "normal": (("network",), derive_normal_map),
+    "pointwise": (("normal",), derive_pointwise_maps),
+    "specular": (("pointwise",), lambda params, pointwise: pointwise["specular"]),
+    "ao": (("normal",), derive_ao_map),
+    "metallic": (("pointwise",), lambda params, pointwise: pointwise["metallic"]),
+    "emission": (("pointwise",), lambda params, pointwise: pointwise["emission"]),
+    "opacity": (("pointwise",), lambda params, pointwise: pointwise["opacity"]),
+    "roughness": (("pointwise",), lambda params, pointwise: pointwise["roughness"]),
+    "orm": (("ao", "roughness", "metallic"), derive_orm_map),
+    "base": (("source", "opacity"), derive_base_map)
+}
+
+def map_dependencies(targets):
+    """
+    Collects the nodes of ``map_graph`` that the targets depend on.
+
+    Args:
+        targets (list): The names of the target nodes.
+
+    Returns:
+        set: The names of all required nodes, including the targets.
+    """
+    required = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in required:
+            required.add(name)
+            pending.extend(map_graph[name][0])
+    return required
+
+def pack_map_names(maps, pack_orm=True, pack_opacity=False):
+    """
+    Replaces separate map names by their channel-packed counterparts.
+
+    Args:
+        maps (list): The keys of ``texture_maps`` to generate.
+        pack_orm (bool, optional): Replace "ao", "roughness" and "metallic" by "orm".
+            Defaults to True.
+        pack_opacity (bool, optional): Replace "opacity" by "base", which carries it in
+            the alpha channel. Defaults to False.
+
+    Returns:
+        list: The map names with the packed maps in place of their sources.
+    """
+    replacements = {}
+    if pack_orm:
+        replacements.update({"ao": "orm", "roughness": "orm", "metallic": "orm"})
+    if pack_opacity:
+        replacements["opacity"] = "base"
+    return list(dict.fromkeys(replacements.get(name, name) for name in maps))
+
+def evaluate_map_graph(targets, params, values=None):
+    """
+    Evaluates the requested nodes of ``map_graph`` and everything they depend on.
+
+    Every node is computed at most once, nodes that no target depends on are skipped.
+
+    Args:
+        targets (list): The names of the nodes to evaluate.
+        params (dict): The parameters passed to every node function.
+        values (dict, optional): Already known node values, e.g. a precomputed network
+            output. Defaults to None.
+
+    Returns:
+        dict: The values of all evaluated nodes, including intermediates.
+    """
+    values = {} if values is None else values
+    # Der fusionierte Durchlauf berechnet nur die Karten, die tatsächlich gebraucht werden
+    params = {**params, "required": map_dependencies(targets)}
+    pending = list(targets)
+    while pending:
+        name = pending[-1]
+        if name in values:
+            pending.pop()
+            continue
+        inputs, derive = map_graph[name]
+        missing = [input_name for input_name in inputs if input_name not in values]
+        if missing:
+            pending.extend(missing)
+            continue
+        with profile_stage(name):
+            values[name] = derive(params, *[values[input_name] for input_name in inputs])
+        pending.pop()
+    return values
+
+def save_texture_maps(maps_by_name, output_dir, suffix, writer=None, manifest=None):
+    """
+    Saves texture maps as ``<name>_map_<suffix>`` files.
+
+    Args:
+        maps_by_name (dict): The texture maps, keyed by their ``map_labels`` key.
+        output_dir (str): The folder the maps are saved to.
+        suffix (str): The file name suffix, usually the resolution.
+        writer (TextureWriter, optional): Writer used to save the maps. Defaults to None,
+            which writes PNGs in parallel and waits for them before returning.
+        manifest (dict, optional): Fields to record with every file in the manifest of
+            ``output_dir``, next to its SHA-256 hash, size in bytes and dimensions. Defaults
+            to None, which writes no manifest entries.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if writer is None:
+        with TextureWriter() as texture_writer:
+            save_texture_maps(maps_by_name, output_dir, suffix, texture_writer, manifest)
+        return
+    files = {}
+    for name, texture_map in maps_by_name.items():
+        height, width = texture_map.shape[:2]
+        if name in packed_maps:
+            # Bei gepackten Karten zählt die Kanalbelegung in der Datei, OpenCV erwartet BGR(A)
+            texture_map = cv2.cvtColor(texture_map, cv2.COLOR_RGBA2BGRA if texture_map.shape[2] == 4 else cv2.COLOR_RGB2BGR)
+        future = writer.write(os.path.join(output_dir, f"{name}_map_{suffix}{writer.extension}"), texture_map)
+        files[name] = (future, {"width": width, "height": height})
+    if manifest is not None:
+        writer.write_manifest(output_dir, files, {"resolution": str(suffix), **manifest})
+
+def manifest_fields(params, seed, category_nodes=None):
+    """
+    Collects the parameters of a job that are recorded in the manifest.
+
+    Args:
+        params (dict): The map parameters, from ``strength`` to ``invert_roughness``, and
+            the precision. Other entries are ignored.
+        seed (int): The seed of the job, or None.
+        category_nodes (list, optional): The category nodes of the job. Their activations
+            tell jobs without a seed apart. Defaults to None.
+
+    Returns:
+        dict: The JSON-serializable parameters.
+    """
+    names = ["strength", "scale", "invert_specular", "blur_radius", "metallic_intensity", "emission_intensity", "opacity_threshold", "invert_roughness", "precision"]
+    return {"params": {
+        **{name: params[name] for name in names},
+        "seed": seed,
+        "activations": None if category_nodes is None else [node.activation for node in category_nodes]
+    }}
+
+def tile_size_for_budget(memory_budget, channels, map_count, halo, network_bytes=4):
+    """
+    Computes the edge length of square tiles whose working set fits a memory budget.
+
+    Per pixel a tile holds the network output, the uint8 normal map and the derived maps
+    themselves; neither the conversion nor the derived maps need full-size temporaries.
+
+    Args:
+        memory_budget (int): The memory budget for one tile in bytes.
+        channels (int): The number of image channels.
+        map_count (int): The number of derived maps.
+        halo (int): The number of extra rows and columns around each tile.
+        network_bytes (int, optional): The bytes per value of the network output, see
+            ``precisions``. Defaults to 4.
+
+    Returns:
+        int: The tile edge length in pixels, at least 16.
+    """
+    bytes_per_pixel = channels * (network_bytes + 1 + map_count)
+    return max(int(math.sqrt(memory_budget / bytes_per_pixel)) - 2 * halo, 16)
+
+def evaluate_map_graph_tiled(targets, params, memory_budget, scratch_dir=None):
+    """
+    Evaluates the requested maps tile by tile with a bounded working set.
+
+    Each tile is extended by a halo wide enough for the ambient occlusion blur kernel, so the
+    assembled maps match an untiled evaluation exactly. The results of every tile are written
+    straight into the full-size output arrays.
+
+    Args:
+        targets (list): The names of the maps to evaluate.
+        params (dict): The parameters passed to every node function.
+        memory_budget (int): The approximate peak memory for one tile in bytes.
+        scratch_dir (str, optional): If given, the resized source and the output arrays are
+            memory-mapped scratch files in this folder, see ``scratch_array``. Finished
+            rows are dropped from resident memory, so it stays about flat with the
+            resolution. Defaults to None, which keeps everything in RAM.
+
+    Returns:
+        dict: The full-size arrays of the requested maps.
+    """
+    if scratch_dir is None:
+        source = derive_source_image(params)
+    else:
+        with profile_stage("source"):
+            source = copy_image_to_scratch(resize_to_resolution(params["image"], params["resolution"]), scratch_dir)
+    height, width = source.shape[:2]
+    channels = source.shape[2] if source.ndim == 3 else 1
+    required = map_dependencies(targets)
+    halo = params["blur_radius"] // 2 if "ao" in required else 0
+    tile_size = tile_size_for_budget(memory_budget, channels, len(required), halo, np.dtype(precisions[params["precision"]]).itemsize)
+
+    outputs = {}
+    for y0 in range(0, height, tile_size):
+        for x0 in range(0, width, tile_size):
+            y1, x1 = min(y0 + tile_size, height), min(x0 + tile_size, width)
+            halo_y0, halo_x0 = max(y0 - halo, 0), max(x0 - halo, 0)
+            halo_y1, halo_x1 = min(y1 + halo, height), min(x1 + halo, width)
+
+            values = evaluate_map_graph(targets, params, {"source": source[halo_y0:halo_y1, halo_x0:halo_x1]})
+
+            for name in targets:
+                tile_map = values[name]
+                if name not in outputs:
+                    shape = (height, width) + tile_map.shape[2:]
+                    outputs[name] = np.empty(shape, dtype=tile_map.dtype) if scratch_dir is None else scratch_array(shape, tile_map.dtype, scratch_dir)
+                outputs[name][y0:y1, x0:x1] = tile_map[y0 - halo_y0:y1 - halo_y0, x0 - halo_x0:x1 - halo_x0]
+
+        # Fertige Kachelzeilen und nicht mehr benötigte Quellzeilen auslagern
+        for output in outputs.values():
+            release_scratch_rows(output, y0, y1)
+        release_scratch_rows(source, 0, max(y1 - halo, 0))
+    return outputs
+
+def process_texture(image, strength, scale, invert_specular, blur_radius, metallic_intensity, emission_intensity, opacity_threshold, invert_roughness, resolution, backend="vectorized", maps=None, memory_budget=None, seed=None, use_cache=True, output_dir="output_textures", writer=None, profiler=None, precision="float32", scratch_dir=None):
+    """
+    Processes the input image to generate various texture maps.
+
+    Args:
+        image (PIL.Image): The input image.
+        strength (float): The strength of the normal map.
+        scale (float): The scale of the height map.
+        invert_specular (bool): Whether to invert the specular map.
+        blur_radius (int): The blur radius for the ambient occlusion map.
+        metallic_intensity (float): The intensity of the metallic map.
+        emission_intensity (float): The intensity of the emission map.
+        opacity_threshold (int): The threshold for the opacity map.
+        invert_roughness (bool): Whether to invert the roughness map.
+        resolution (str or tuple): The resolution of the output images, a key of
+            ``resolutions`` or an explicit ``(width, height)`` tuple.
+        backend (str, optional): The engine used for the network stage, one of
+            ``texture_backends``. Defaults to "vectorized".
+        maps (list, optional): The keys of ``map_labels`` to generate and save, e.g.
+            ``["normal", "roughness"]``. The packed maps "orm" (AO, roughness and metallic
+            in R, G and B) and "base" (source RGB with opacity as alpha) can be requested
+            like any other map, see ``pack_map_names``. Defaults to the seven separate maps.
+        memory_budget (int, optional): If given, the maps are computed in tiles whose
+            working set stays within about this many bytes instead of growing with the
+            resolution. The output is identical to the untiled path. Defaults to None.
+        seed (int, optional): Seed for the category node activations. Defaults to None.
+        use_cache (bool, optional): Whether to reuse the network stage result from
+            ``network_cache`` when the image, resolution and activations match, so only the
+            cheap derived maps are recomputed. Ignored in tiled mode and without a seed,
+            because random activations never match again. Defaults to True.
+        output_dir (str, optional): The folder the maps are saved to, together with a
+            ``texturelab_manifest.json`` that lists every file with its SHA-256 hash, size
+            and the parameters it was made with. If None, nothing is written to disk.
+            Defaults to "output_textures".
+        writer (TextureWriter, optional): Writer used to save the maps. If given, the
+            function returns as soon as the maps are computed while the writer flushes them
+            in the background; call ``writer.wait()`` to await completion. Defaults to None,
+            which writes PNGs in parallel and waits for them before returning.
+        profiler (Profiler, optional): Profiler that records every stage of this job; read
+            the measurements with ``profiler.report()``. Defaults to None, which keeps the
+            profiler of an enclosing job or records nothing.
+        precision (str, optional): The working precision of the network stage, a key of
+            ``precisions``. "float32" and "uint8" give identical maps, "uint8" needs about
+            a fifth of the memory per pixel and ignores the backend; "float16" halves the
+            float buffer but may shift values by one level and is slow on CPUs without
+            half-precision arithmetic, so it mainly suits the torch backend on a GPU.
+            Defaults to "float32".
+        scratch_dir (str, optional): Enables the out-of-core mode for very large
+            resolutions: the resized source and every map are kept in memory-mapped scratch
+            files in this folder instead of RAM and computed in tiles of ``memory_budget``
+            (64 MiB if not given). The writer encodes straight from these files and the
+            returned maps are backed by them. Defaults to None.
+
+    Returns:
+        dict: A dictionary containing the generated texture maps.
+    """
+    maps = list(texture_maps) if maps is None else list(maps)
+    unknown_maps = [name for name in maps if name not in map_labels]
+    if unknown_maps:
+        raise ValueError(f"Unknown maps {unknown_maps}, expected keys of {list(map_labels)}")
+
+    token = active_profiler.set(active_profiler.get() if profiler is None else profiler)
+    try:
+        category_nodes = create_category_nodes(seed)
+
+        params = {
+            "image": image,
+            "category_nodes": category_nodes,
+            "resolution": resolution,
+            "backend": backend,
+            "precision": precision,
+            "strength": strength,
+            "scale": scale,
+            "invert_specular": invert_specular,
+            "blur_radius": blur_radius,
+            "metallic_intensity": metallic_intensity,
+            "emission_intensity": emission_intensity,
+            "opacity_threshold": opacity_threshold,
+            "invert_roughness": invert_roughness
+        }
+        if memory_budget is None and scratch_dir is None:
+            values = {}
+            # Ohne Seed sind die Aktivierungen zufällig, ein Eintrag könnte nie getroffen werden
+            use_cache = use_cache and seed is not None
+            if use_cache:
+                with profile_stage("cache_lookup"):
+                    cache_key = network_cache_key(image, resolution, category_nodes, precision)
+                    cached_normal_map = network_cache.get(cache_key)
+                if cached_normal_map is not None:
+                    values["normal"] = cached_normal_map
+            values = evaluate_map_graph(maps, params, values)
+            if use_cache and cached_normal_map is None and "normal" in values:
+                network_cache.put(cache_key, values["normal"])
+        else:
+            values = evaluate_map_graph_tiled(maps, params, memory_budget or scratch_tile_budget, scratch_dir)
+
+        # Save Textures
+        if output_dir is not None:
+            with profile_stage("save"):
+                save_texture_maps({name: values[name] for name in maps}, output_dir, resolution, writer, manifest_fields(params, seed, category_nodes))
+
+        return {map_labels[name]: texture for name, texture in zip(maps, writable_maps([values[name] for name in maps]))}
+    finally:
+        active_profiler.reset(token)
+
+def writable_maps(textures):
+    """
+    Makes sure every returned map is a writable array of its own.
+
+    Maps with an identity transform share the buffer of the normal map, and a cached normal
+    map is read-only. Such maps are copied, so callers can modify each map independently.
+
+    Args:
+        textures (list): The computed maps.
+
+    Returns:
+        list: The maps, with read-only or shared arrays replaced by copies.
+    """
+    result = []
+    for texture in textures:
+        if not texture.flags.writeable or any(np.shares_memory(texture, other) for other in result):
+            texture = texture.copy()
+        result.append(texture)
+    return result
+
+def build_mip_chain(texture_map):
+    """
+    Builds the mip chain of a texture map by repeated 2x box-filter downsampling.
+
+    Args:
+        texture_map (np.ndarray): The full-size texture map.
+
+    Returns:
+        list: The mip levels, starting with the full-size map and ending at 1x1.
+    """
+    levels = [texture_map]
+    while max(levels[-1].shape[:2]) > 1:
+        height, width = levels[-1].shape[:2]
+        levels.append(cv2.resize(levels[-1], (max(1, width // 2), max(1, height // 2)), interpolation=cv2.INTER_AREA))
+    return levels
+
+def pyramid_sources(resolution_names):
+    """
+    Plans from which level every resolution of a pyramid is downsampled.
+
+    ``INTER_AREA`` only averages correctly when shrinking, so a level is never derived from
+    one that is narrower or lower than itself. The full pass runs at the bounding size of all
+    resolutions; if no requested resolution covers all others (``["Cover", "HD"]``), that
+    is an explicit ``(width, height)`` size that is only used as a source.
+
+    Args:
+        resolution_names (list): The keys of ``resolutions`` to generate.
+
+    Returns:
+        tuple: The resolution of the full pass, a key of ``resolutions`` or a
+        ``(width, height)`` tuple, and a dictionary mapping every other requested
+        resolution to its source, in the order they have to be computed.
+    """
+    names = sorted(dict.fromkeys(resolution_names), key=lambda name: resolutions[name][0] * resolutions[name][1], reverse=True)
+    bounding_size = (max(resolutions[name][0] for name in names), max(resolutions[name][1] for name in names))
+    base_resolution = next((name for name in names if resolutions[name] == bounding_size), bounding_size)
+
+    def size(resolution):
+        return resolution if isinstance(resolution, tuple) else resolutions[resolution]
+
+    computed = [base_resolution]
+    sources = {}
+    for name in names:
+        if name == base_resolution:
+            continue
+        width, height = resolutions[name]
+        # Die kleinste bereits berechnete Stufe, die in beiden Richtungen mindestens so groß ist
+        covering = [level for level in computed if size(level)[0] >= width and size(level)[1] >= height]
+        sources[name] = min(covering, key=lambda level: size(level)[0] * size(level)[1])
+        computed.append(name)
+    return base_resolution, sources
+
+def process_texture_pyramid(image, strength, scale, invert_specular, blur_radius, metallic_intensity, emission_intensity, opacity_threshold, invert_roughness, resolution_names, backend="vectorized", maps=None, memory_budget=None, seed=None, use_cache=True, output_dir="output_textures", writer=None, mip_chain=False, profiler=None, precision="float32", scratch_dir=None):
+    """
+    Generates the texture maps for several resolutions from a single pass.
+
+    The maps are computed once at the bounding size of all requested resolutions, which is
+    the largest requested resolution unless the aspect ratios differ (``["Cover", "HD"]``
+    is computed at 1280x1024). Every other resolution is downsampled from the smallest
+    already computed level that covers it in both dimensions, see ``pyramid_sources``,
+    instead of rerunning the pipeline.
+
+    Args:
+        image (PIL.Image): The input image.
+        strength (float): The strength of the normal map.
+        scale (float): The scale of the height map.
+        invert_specular (bool): Whether to invert the specular map.
+        blur_radius (int): The blur radius for the ambient occlusion map.
+        metallic_intensity (float): The intensity of the metallic map.
+        emission_intensity (float): The intensity of the emission map.
+        opacity_threshold (int): The threshold for the opacity map.
+        invert_roughness (bool): Whether to invert the roughness map.
+        resolution_names (list): The keys of ``resolutions`` to generate.
+        backend (str, optional): The engine used for the network stage. Defaults to "vectorized".
+        maps (list, optional): The keys of ``map_labels`` to generate. Defaults to the seven
+            separate maps.
+        memory_budget (int, optional): Tile memory budget for the full-size pass, see
+            ``process_texture``. Defaults to None.
+        seed (int, optional): Seed for the category node activations. Defaults to None.
+        use_cache (bool, optional): Whether to use ``network_cache``, see
+            ``process_texture``. Defaults to True.
+        output_dir (str, optional): The folder the maps are saved to. If None, nothing is
+            written to disk. Defaults to "output_textures".
+        writer (TextureWriter, optional): Writer used to save the maps, see
+            ``process_texture``. Defaults to None.
+        mip_chain (bool, optional): Whether to also emit the full mip chain of every map,
+            saved as ``<map>_map_<resolution>_mip<level>``. Defaults to False.
+        profiler (Profiler, optional): Profiler that records every stage of this job.
+            Defaults to None.
+        precision (str, optional): The working precision of the network stage, see
+            ``process_texture``. Defaults to "float32".
+        scratch_dir (str, optional): Out-of-core mode for the full-size pass, see
+            ``process_texture``. Defaults to None.
+
+    Returns:
+        dict: For every resolution a dictionary of the generated texture maps. With
+        ``mip_chain`` each map is a list of its mip levels, starting with the full-size map.
+    """
+    token = active_profiler.set(active_profiler.get() if profiler is None else profiler)
+    try:
+        base_resolution, sources = pyramid_sources(resolution_names)
+        computed = {base_resolution: process_texture(image, strength, scale, invert_specular, blur_radius, metallic_intensity, emission_intensity, opacity_threshold, invert_roughness, base_resolution, backend=backend, maps=maps, memory_budget=memory_budget, seed=seed, use_cache=use_cache, output_dir=None, precision=precision, scratch_dir=scratch_dir)}
+
+        for resolution, source in sources.items():
+            with profile_stage("downsample"):
+                computed[resolution] = {label: cv2.resize(texture_map, resolutions[resolution], interpolation=cv2.INTER_AREA) for label, texture_map in computed[source].items()}
+        # Eine nur als Hüllgröße berechnete Stufe wird weder gespeichert noch zurückgegeben
+        levels = {resolution: computed[resolution] for resolution in dict.fromkeys(resolution_names)}
+
+        if mip_chain:
+            with profile_stage("mip_chain"):
+                levels = {resolution: {label: build_mip_chain(texture_map) for label, texture_map in textures.items()} for resolution, textures in levels.items()}
+
+        if output_dir is not None:
+            map_names = {label: name for name, label in map_labels.items()}
+            # Mit Seed sind die Aktivierungen reproduzierbar, ohne Seed bleiben sie unbekannt
+            manifest = manifest_fields(dict(strength=strength, scale=scale, invert_specular=invert_specular, blur_radius=blur_radius, metallic_intensity=metallic_intensity, emission_intensity=emission_intensity, opacity_threshold=opacity_threshold, invert_roughness=invert_roughness, precision=precision), seed, None if seed is None else create_category_nodes(seed))
+            texture_writer = TextureWriter() if writer is None else writer
+            try:
+                for resolution, textures in levels.items():
+                    if not mip_chain:
+                        save_texture_maps({map_names[label]: texture_map for label, texture_map in textures.items()}, output_dir, resolution, texture_writer, manifest)
+                        continue
+                    save_texture_maps({map_names[label]: chain[0] for label, chain in textures.items()}, output_dir, resolution, texture_writer, manifest)
+                    for level in range(1, max(len(chain) for chain in textures.values())):
+                        save_texture_maps({map_names[label]: chain[level] for label, chain in textures.items()}, output_dir, f"{resolution}_mip{level}", texture_writer, manifest)
+            finally:
+                if writer is None:
+                    texture_writer.close()
+
+        return {resolution: levels[resolution] for resolution in resolution_names}
+    finally:
+        active_profiler.reset(token)
+
+# ---------------------------
+# Auftragswarteschlange
+# ---------------------------
+
+def texture_memory_cost(resolution, map_count=len(texture_maps), precision="float32", channels=3):
+    """
+    Estimates the peak memory of one texture job.
+
+    Per pixel a job holds the resized source, the network output, the normal map and the
+    derived maps until they are written.
+
+    Args:
+        resolution (str or tuple): A key of ``resolutions`` or a ``(width, height)`` tuple.
+        map_count (int, optional): The number of maps. Defaults to the seven separate maps.
+        precision (str, optional): The precision of the network stage. Defaults to "float32".
+        channels (int, optional): The number of image channels. Defaults to 3.
+
+    Returns:
+        int: The estimated memory in bytes.
+    """
+    width, height = resolution if isinstance(resolution, tuple) else resolutions.get(resolution, (1024, 1024))
+    return width * height * channels * (1 + np.dtype(precisions[precision]).itemsize + 1 + map_count)
+
+def default_job_memory_budget():
+    """
+    Returns half of the physical memory, or 4 GiB where it cannot be determined.
+    """
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // 2
+    except (AttributeError, ValueError, OSError):
+        return 4 * 1024 ** 3
+
+class JobProgress(Profiler):
+    """
+    Profiler that derives the progress of a job from its finished stages.
+
+    Attributes:
+        expected_stages (set): The graph nodes the job computes.
+        expected_writes (int): The number of files the job writes.
+    """
+    def __init__(self, maps):
+        super().__init__(trace_memory=False)
+        self.expected_stages = map_dependencies(maps)
+        self.expected_writes = len(maps)
+
+    @property
+    def progress(self):
+        """
+        float: The share of finished graph nodes and written files, between 0 and 1.
+        """
+        with self.lock:
+            done = sum(1 for name in self.stages if name in self.expected_stages or name.startswith("write."))
+        return min(1.0, done / (len(self.expected_stages) + self.expected_writes))
+
+class TextureJob:
+    """
+    An export job of the ``JobScheduler``.
+
+    Attributes:
+        job_id (str): The unique id, also the name of the output folder.
+        key (tuple): The image hash, resolution, parameters, seed and precision.
+        cost (int): The estimated memory of the job in bytes.
+        output_dir (str): The folder the maps are written to.
+        progress (JobProgress): The profiler recording the stages of the job.
+        future (concurrent.futures.Future): Resolves to the texture maps of
+            ``process_texture`` when the job is done.
+        state (str): "queued", "running", "done" or "failed".
+        requests (int): The number of identical requests sharing this job.
+    """
+    def __init__(self, job_id, key, cost, output_dir, progress, run):
+        self.job_id = job_id
+        self.key = key
+        self.cost = cost
+        self.output_dir = output_dir
+        self.progress = progress
+        self.run = run
+        self.future = Future()
+        self.state = "queued"
+        self.requests = 1
+
+class JobScheduler:
+    """
+    Runs export jobs concurrently within a memory budget.
+
+    Jobs start in submission order as long as the estimated memory of all running jobs
+    stays within the budget; a job larger than the budget runs on its own. Every job
+    writes to its own folder, and a request identical to a queued or running job (same
+    image, resolution, parameters and seed) is merged into it instead of computed again.
+
+    Attributes:
+        memory_budget (int): The memory all running jobs may use together, in bytes.
+        max_workers (int): The maximum number of jobs running at the same time.
+        output_root (str): The folder that holds the job folders.
+    """
+    def __init__(self, memory_budget=None, max_workers=None, output_root="output_textures"):
+        self.memory_budget = memory_budget or default_job_memory_budget()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.output_root = output_root
+        self.lock = threading.Lock()
+        self.pending = deque()
+        self.running = []
+        self.jobs = {}
+        self.executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="texturelab-job")
+
+    def submit(self, image, resolution, params, seed=None, maps=None, precision="float32"):
+        """
+        Queues an export job, or joins an identical job that is already in flight.
+
+        Args:
+            image (PIL.Image): The input image.
+            resolution (str): The resolution of the output images.
+            params (dict): The map parameters of ``process_texture``, from ``strength`` to
+                ``invert_roughness``.
+            seed (int, optional): Seed for the category node activations. Jobs without a
+                seed are never merged, because their activations are random. Defaults to None.
+            maps (list, optional): The maps to generate. Defaults to the seven separate maps.
+            precision (str, optional): The precision of the network stage. Defaults to "float32".
+
+        Returns:
+            TextureJob: The job that computes the request.
+        """
+        maps = list(texture_maps) if maps is None else list(maps)
+        key = (image_hash(image), resolution, tuple(sorted(params.items())), seed, tuple(maps), precision)
+        with self.lock:
+            job = self.jobs.get(key) if seed is not None else None
+            if job is not None:
+                job.requests += 1
+                return job
+            digest = hashlib.blake2b(repr(key).encode() + os.urandom(8), digest_size=4).hexdigest()
+            job_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{digest}"
+            output_dir = os.path.join(self.output_root, job_id)
+            progress = JobProgress(maps)
+
+            def run():
+                return process_texture(image, **params, resolution=resolution, maps=maps, seed=seed, precision=precision, output_dir=output_dir, profiler=progress)
+
+            job = TextureJob(job_id, key, texture_memory_cost(resolution, len(maps), precision), output_dir, progress, run)
+            # Nur zusammenführbare Aufträge werden registriert, sonst würde ein zweiter
+            # ungeseedeter Auftrag den Eintrag des ersten überschreiben
+            if seed is not None:
+                self.jobs[key] = job
+            self.pending.append(job)
+            self.dispatch()
+        return job
+
+    def dispatch(self):
+        # Wird mit gehaltenem Lock aufgerufen; strikt in Reihenfolge, damit große Aufträge
+        # nicht von nachrückenden kleinen verdrängt werden
+        while self.pending and len(self.running) < self.max_workers:
+            job = self.pending[0]
+            if self.running and sum(running.cost for running in self.running) + job.cost > self.memory_budget:
+                break
+            self.pending.popleft()
+            self.running.append(job)
+            job.state = "running"
+            self.executor.submit(self.execute, job)
+
+    def execute(self, job):
+        """
+        Runs a job in a worker thread and starts the next jobs when it finishes.
+        """
+        try:
+            textures = job.run()
+            job.state = "done"
+            job.future.set_result(textures)
+        except Exception as error:
+            job.state = "failed"
+            job.future.set_exception(error)
+        finally:
+            with self.lock:
+                try:
+                    self.running.remove(job)
+                    if self.jobs.get(job.key) is job:
+                        del self.jobs[job.key]
+                finally:
+                    self.dispatch()
+
+    def status(self, job):
+        """
+        Describes the state of a job for the UI.
+
+        Args:
+            job (TextureJob): A job returned by ``submit``.
+
+        Returns:
+            dict: The job state, its 1-based position in the queue (0 once started), the
+            number of queued and running jobs and the progress between 0 and 1.
+        """
+        with self.lock:
+            position = next((i + 1 for i, queued in enumerate(self.pending) if queued is job), 0)
+            queue_depth = len(self.pending)
+            running = len(self.running)
+        progress = 1.0 if job.state == "done" else job.progress.progress if job.state == "running" else 0.0
+        return {"state": job.state, "position": position, "queue_depth": queue_depth, "running": running, "progress": progress}
+
+_job_scheduler = None
+_job_scheduler_lock = threading.Lock()
+
+def get_job_scheduler():
+    """
+    Returns the job scheduler of the UI, creating it on first use.
+
+    Returns:
+        JobScheduler: The shared scheduler.
+    """
+    global _job_scheduler
+    with _job_scheduler_lock:
+        if _job_scheduler is None:
+            _job_scheduler = JobScheduler()
+        return _job_scheduler
+
+# ---------------------------
+# Gradio Interface
+# ---------------------------
+
+def texture_params(strength, scale, invert_specular, blur_radius, metallic_intensity, emission_intensity, opacity_threshold, invert_roughness):
+    """
+    Collects the map parameters of the UI as keyword arguments of ``process_texture``.
+    """
+    return {
+        "strength": strength,
+        "scale": scale,
+        "invert_specular": invert_specular,
+        "blur_radius": blur_radius,
+        "metallic_intensity": metallic_intensity,
+        "emission_intensity": emission_intensity,
+        "opacity_threshold": opacity_threshold,
+        "invert_roughness": invert_roughness
+    }
+
+def process_and_display(image, resolution, strength, scale, invert_specular, blur_radius, metallic_intensity, emission_intensity, opacity_threshold, invert_roughness, seed=None):
+    """
+    Processes the input image and displays the generated texture maps.
+
+    Args:
+        image (PIL.Image): The input image.
+        resolution (str): The resolution of the output images.
+        strength (float): The strength of the normal map.
+        scale (float): The scale of the height map.
+        invert_specular (bool): Whether to invert the specular map.
+        blur_radius (int): The blur radius for the ambient occlusion map.
+        metallic_intensity (float): The intensity of the metallic map.
+        emission_intensity (float): The intensity of the emission map.
+        opacity_threshold (int): The threshold for the opacity map.
+        invert_roughness (bool): Whether to invert the roughness map.
+        seed (int, optional): Seed for the category node activations. Keeping the seed
+            lets repeated runs reuse the cached network stage. Defaults to None.
+
+    Returns:
+        tuple: A tuple containing the generated texture maps as PIL images.
+    """
+    seed = None if seed is None else int(seed)
+    params = texture_params(strength, scale, invert_specular, blur_radius, metallic_intensity, emission_intensity, opacity_threshold, invert_roughness)
+    textures = get_job_scheduler().submit(image, resolution, params, seed).future.result()
+    return (Image.fromarray(textures["Normal Map"]),
+            Image.fromarray(textures["Specular Map"]),
+            Image.fromarray(textures["AO Map"]),
+            Image.fromarray(textures["Metallic Map"]),
+            Image.fromarray(textures["Emission Map"]),
+            Image.fromarray(textures["Opacity Map"]),
+            Image.fromarray(textures["Roughness Map"]))
+
+def preview_textures(image, resolution, strength, scale, invert_specular, blur_radius, metallic_intensity, emission_intensity, opacity_threshold, invert_roughness, seed=None):
+    """
+    Renders all texture maps at a small proxy size for the live preview.
+
+    The proxy keeps the aspect ratio of the selected export resolution and uses the same
+    seeded activations as the export, so the preview matches the final textures. It is
+    computed in the exact uint8 precision and nothing is written to disk.
+
+    Args:
+        image (PIL.Image): The input image.
+        resolution (str): The export resolution the preview stands in for.
+        strength (float): The strength of the normal map.
+        scale (float): The scale of the height map.
+        invert_specular (bool): Whether to invert the specular map.
+        blur_radius (int): The blur radius for the ambient occlusion map.
+        metallic_intensity (float): The intensity of the metallic map.
+        emission_intensity (float): The intensity of the emission map.
+        opacity_threshold (int): The threshold for the opacity map.
+        invert_roughness (bool): Whether to invert the roughness map.
+        seed (int, optional): Seed for the category node activations. Defaults to None.
+
+    Returns:
+        tuple: A tuple containing the preview texture maps as PIL images.
+    """
+    if image is None:
+        return (None,) * len(texture_maps)
+    seed = None if seed is None else int(seed)
+    textures = process_texture(image, strength, scale, invert_specular, blur_radius, metallic_intensity, emission_intensity, opacity_threshold, invert_roughness, preview_resolution(resolution), seed=seed, output_dir=None, precision="uint8")
+    return tuple(Image.fromarray(textures[label]) for label in texture_maps.values())
+
+def export_textures(image, resolution, strength, scale, invert_specular, blur_radius, metallic_intensity, emission_intensity, opacity_threshold, invert_roughness, seed=None):
+    """
+    Generates the texture maps at the full export resolution and saves them to disk.
+
+    The export runs as a job of ``get_job_scheduler()`` and is written to its own folder
+    below ``output_textures``. This function blocks until the job is done, the UI uses
+    ``stream_export_textures`` to show the queue position and progress meanwhile.
+
+    Args:
+        image (PIL.Image): The input image.
+        resolution (str): The resolution of the output images.
+        strength (float): The strength of the normal map.
+        scale (float): The scale of the height map.
+        invert_specular (bool): Whether to invert the specular map.
+        blur_radius (int): The blur radius for the ambient occlusion map.
+        metallic_intensity (float): The intensity of the metallic map.
+        emission_intensity (float): The intensity of the emission map.
+        opacity_threshold (int): The threshold for the opacity map.
+        invert_roughness (bool): Whether to invert the roughness map.
+        seed (int, optional): Seed for the category node activations. Defaults to None.
+
+    Returns:
+        tuple: A status message listing the written files and the profiling report.
+    """
+    if image is None:
+        return "Bitte zuerst eine Textur hochladen.", {}
+    seed = None if seed is None else int(seed)
+    params = texture_params(strength, scale, invert_specular, blur_radius, metallic_intensity, emission_intensity, opacity_threshold, invert_roughness)
+    job = get_job_scheduler().submit(image, resolution, params, seed)
+    job.future.result()
+    return export_summary(job, resolution), job.progress.report()
+
+def stream_export_textures(image, resolution, strength, scale, invert_specular, blur_radius, metallic_intensity, emission_intensity, opacity_threshold, invert_roughness, seed=None):
+    """
+    Runs ``export_textures`` as a scheduler job and reports its state while it waits.
+
+    Yields:
+        tuple: A status message and the profiling report, which stays empty until the
+        job is done. While waiting, the message shows the queue position or the progress.
+    """
+    if image is None:
+        yield "Bitte zuerst eine Textur hochladen.", {}
+        return
+    seed = None if seed is None else int(seed)
+    scheduler = get_job_scheduler()
+    params = texture_params(strength, scale, invert_specular, blur_radius, metallic_intensity, emission_intensity, opacity_threshold, invert_roughness)
+    job = scheduler.submit(image, resolution, params, seed)
+    while True:
+        try:
+            job.future.result(timeout=0.5)
+        except FutureTimeoutError:
+            yield format_job_status(scheduler.status(job)), {}
+            continue
+        except Exception as error:
+            yield f"Export fehlgeschlagen: {error}", {}
+            return
+        yield export_summary(job, resolution), job.progress.report()
+        return
+
+def format_job_status(status):
+    """
+    Formats the result of ``JobScheduler.status`` as a status line for the UI.
+    """
+    if status["state"] == "queued":
+        return f"In der Warteschlange: Position {status['position']} von {status['queue_depth']} ({status['running']} Aufträge laufen)."
+    return f"Wird berechnet: {status['progress']:.0%} ({status['queue_depth']} Aufträge warten)."
+
+def export_summary(job, resolution):
+    """
+    Lists the files written by a finished export job.
+    """
+    files = [os.path.join(job.output_dir, f"{name}_map_{resolution}.png") for name in texture_maps]
+    return "Texturen exportiert:\n" + "\n".join(f"- `{path}`" for path in files)
+
+def build_demo():
+    """
+    Builds the Gradio interface. Gradio is only imported here, so scripted and batch use
+    of this module does not load the UI stack.
+
+    Returns:
+        gr.Blocks: The interface, ready to ``launch()``.
+    """
+    import gradio as gr
+
+    with gr.Blocks() as demo:
+        gr.Markdown("### Textur-Generator mit neuronaler Netzwerk-Verarbeitung")
+
+        with gr.Row():
+            with gr.Column():
+                input_image = gr.Image(label="Input Texture", type="pil")
+                resolution_dropdown = gr.Dropdown(label="Auflösung", choices=list(resolutions.keys()), value="Full HD")
+                strength_slider = gr.Slider(label="Normal Map Strength", minimum=1, maximum=10, step=1, value=5)
+                scale_slider = gr.Slider(label="Height Map Scale", minimum=0.1, maximum=3.0, step=0.1, value=1.0)
+                invert_specular_checkbox = gr.Checkbox(label="Invert Specular Map", value=False)
+                blur_radius_slider = gr.Slider(label="Ambient Occlusion Blur Radius", minimum=1, maximum=31, step=2, value=5)
+                metallic_slider = gr.Slider(label="Metallic Intensity", minimum=0.1, maximum=3.0, step=0.1, value=1.0)
+                emission_slider = gr.Slider(label="Emission Intensity", minimum=0.1, maximum=3.0, step=0.1, value=1.0)
+                opacity_slider = gr.Slider(label="Opacity Threshold", minimum=0, maximum=255, step=1, value=128)
+                invert_roughness_checkbox = gr.Checkbox(label="Invert Roughness Map", value=False)
+                seed_number = gr.Number(label="Seed", value=0, precision=0)
+
+            with gr.Column():
+                normal_preview = gr.Image(label="Normal Map")
+                specular_preview = gr.Image(label="Specular Map")
+                ao_preview = gr.Image(label="Ambient Occlusion Map")
+                metallic_preview = gr.Image(label="Metallic Map")
+                emission_preview = gr.Image(label="Emission Map")
+                opacity_preview = gr.Image(label="Opacity Map")
+                roughness_preview = gr.Image(label="Roughness Map")
+
+        export_button = gr.Button("Texturen exportieren")
+        export_status = gr.Markdown()
+        with gr.Accordion("Profiling", open=False):
+            profiling_report = gr.JSON(label="Laufzeit und Speicher pro Stufe")
+
+        texture_inputs = [input_image, resolution_dropdown, strength_slider, scale_slider, invert_specular_checkbox, blur_radius_slider, metallic_slider, emission_slider, opacity_slider, invert_roughness_checkbox, seed_number]
+        preview_outputs = [normal_preview, specular_preview, ao_preview, metallic_preview, emission_preview, opacity_preview, roughness_preview]
+
+        # Die Vorschau wird bei jeder Änderung in reduzierter Größe neu berechnet
+        for texture_input in texture_inputs:
+            texture_input.change(preview_textures, inputs=texture_inputs, outputs=preview_outputs, trigger_mode="always_last")
+
+        # Die Aufträge begrenzt der JobScheduler, Gradio soll sie nicht zusätzlich serialisieren
+        export_button.click(
+            stream_export_textures,
+            inputs=texture_inputs,
+            outputs=[export_status, profiling_report],
+            concurrency_limit=None
+        )
+
+    return demo
+
+def __getattr__(name):
+    # `demo` wird erst beim ersten Zugriff gebaut, damit der Import ohne Gradio auskommt
+    if name == "demo":
+        globals()["demo"] = build_demo()
+        return globals()["demo"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# ---------------------------
+# Kommandozeile
+# ---------------------------
+
+input_extensions = (".png", ".jpg", ".jpeg", ".bmp", ".tga", ".tif", ".tiff", ".webp")
+
+def collect_input_files(inputs):
+    """
+    Expands directories and glob patterns into a sorted list of image files.
+
+    Args:
+        inputs (list): Files, directories or glob patterns.
+
+    Returns:
+        list: The image files, without duplicates.
+    """
+    files = []
+    for entry in inputs:
+        if os.path.isdir(entry):
+            candidates = [os.path.join(entry, name) for name in sorted(os.listdir(entry))]
+        else:
+            candidates = sorted(glob.glob(entry)) or [entry]
+        files.extend(path for path in candidates if os.path.isfile(path) and path.lower().endswith(input_extensions))
+    return list(dict.fromkeys(files))
+
+def job_dir_names(files):
+    """
+    Assigns every input file a distinct output folder name.
+
+    A file keeps its name without extension as long as no other input shares it. Inputs
+    with the same name (``a/wood.png``, ``b/wood.png``, ``a/wood.jpg``) are named after
+    their path relative to the common folder of all inputs, extension included
+    (``a_wood_png``, ...); any remaining clash gets a numeric suffix.
+
+    Args:
+        files (list): The input files, see ``collect_input_files``.
+
+    Returns:
+        dict: The folder name of every file.
+    """
+    stems = [os.path.splitext(os.path.basename(path))[0] for path in files]
+    stem_counts = Counter(stems)
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in files]) if files else ""
+    names = {}
+    used = set()
+    for path, stem in zip(files, stems):
+        name = stem
+        if stem_counts[stem] > 1:
+            relative = os.path.relpath(os.path.abspath(path), root)
+            name = re.sub(r"[\\/.:]+", "_", relative)
+        candidate, suffix = name, 2
+        while candidate in used:
+            candidate, suffix = f"{name}_{suffix}", suffix + 1
+        used.add(candidate)
+        names[path] = candidate
+    return names
+
+def run_batch(args):
+    """
+    Processes every input file for every requested resolution without the UI.
+
+    The maps of each input are written to their own folder below ``output_dir``, see
+    ``job_dir_names``. While one job is computed, the files of the previous job are still
+    being encoded in the background. Inputs that cannot be read are reported and skipped.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+
+    Returns:
+        int: The exit code, 1 if no input files were found or some could not be read.
+    """
+    files = collect_input_files(args.inputs)
+    if not files:
+        print("Keine Eingabedateien gefunden.")
+        return 1
+
+    maps = pack_map_names(args.maps or list(texture_maps), args.pack_orm, args.pack_opacity)
+    job_dirs = job_dir_names(files)
+    failed = []
+    previous_writer = None
+    try:
+        for path in files:
+            job_dir = os.path.join(args.output_dir, job_dirs[path])
+            try:
+                with Image.open(path) as source:
+                    image = source.convert("RGB")
+            except (OSError, ValueError, Image.DecompressionBombError) as error:
+                # Eine defekte Eingabe soll nicht den ganzen Stapel abbrechen
+                print(f"{path}: kann nicht gelesen werden, übersprungen ({error})")
+                failed.append(path)
+                continue
+            # Mit --pyramid wird nur einmal in der größten Auflösung (bzw. der Hüllgröße) gerechnet
+            jobs = [args.resolutions] if args.pyramid or args.mip_chain else [[resolution] for resolution in args.resolutions]
+            for job_resolutions in jobs:
+                with Profiler() if args.profile else nullcontext() as profiler:
+                    start_time = time.perf_counter()
+                    writer = TextureWriter(args.format, args.png_compression)
+                    if len(job_resolutions) > 1 or args.mip_chain:
+                        process_texture_pyramid(image, args.strength, args.scale, args.invert_specular, args.blur_radius, args.metallic_intensity, args.emission_intensity, args.opacity_threshold, args.invert_roughness, job_resolutions, backend=args.backend, maps=maps, memory_budget=args.memory_budget, seed=args.seed, use_cache=False, output_dir=job_dir, writer=writer, mip_chain=args.mip_chain, profiler=profiler, precision=args.precision, scratch_dir=args.scratch_dir)
+                    else:
+                        process_texture(image, args.strength, args.scale, args.invert_specular, args.blur_radius, args.metallic_intensity, args.emission_intensity, args.opacity_threshold, args.invert_roughness, job_resolutions[0], backend=args.backend, maps=maps, memory_budget=args.memory_budget, seed=args.seed, use_cache=False, output_dir=job_dir, writer=writer, profiler=profiler, precision=args.precision, scratch_dir=args.scratch_dir)
+                    if previous_writer is not None:
+                        previous_writer.close()
+                    previous_writer = writer
+                    print(f"{path} -> {job_dir} ({', '.join(job_resolutions)}, {time.perf_counter() - start_time:.2f}s)")
+                    if profiler is not None:
+                        # Wartet auch auf die Schreibvorgänge, damit sie im Bericht enthalten sind
+                        writer.wait()
+                        profiler.log_json(input=path, resolutions=job_resolutions)
+    finally:
+        if previous_writer is not None:
+            previous_writer.close()
+    if failed:
+        print(f"{len(failed)} von {len(files)} Eingabedateien übersprungen.")
+        return 1
+    return 0
+
+def build_parser():
+    """
+    Builds the command line parser.
+
+    Returns:
+        argparse.ArgumentParser: The parser with the "ui" and "batch" commands.
+    """
+    parser = argparse.ArgumentParser(prog="texturelab", description="TextureLab: PBR-Texturen aus einem Bild erzeugen.")
+    commands = parser.add_subparsers(dest="command")
+
+    ui_parser = commands.add_parser("ui", help="Startet die Gradio-Oberfläche (Standard).")
+    ui_parser.add_argument("--no-share", dest="share", action="store_false", help="Keinen öffentlichen Gradio-Link erzeugen.")
+
+    batch_parser = commands.add_parser("batch", help="Verarbeitet Dateien, Ordner oder Glob-Muster ohne Oberfläche.")
+    batch_parser.add_argument("inputs", nargs="+", help="Eingabedateien, Ordner oder Glob-Muster.")
+    batch_parser.add_argument("-r", "--resolutions", nargs="+", default=["2K"], choices=list(resolutions), help="Eine oder mehrere Auflösungen.")
+    batch_parser.add_argument("-o", "--output-dir", default="output_textures", help="Zielordner, darin ein Unterordner pro Eingabedatei.")
+    batch_parser.add_argument("--pyramid", action="store_true", help="Alle Auflösungen aus einem Durchlauf in der größten Auflösung (bzw. der Hüllgröße) ableiten.")
+    batch_parser.add_argument("--mip-chain", action="store_true", help="Zusätzlich die vollständige Mip-Kette jeder Karte schreiben (impliziert --pyramid).")
+    batch_parser.add_argument("--maps", nargs="+", choices=list(texture_maps), help="Nur diese Karten erzeugen.")
+    batch_parser.add_argument("--pack-orm", action="store_true", help="AO, Roughness und Metallic als R/G/B einer ORM-Datei schreiben.")
+    batch_parser.add_argument("--pack-opacity", action="store_true", help="Opacity als Alphakanal einer Base-Color-Datei schreiben.")
+    batch_parser.add_argument("--backend", default="vectorized", choices=texture_backends)
+    batch_parser.add_argument("--precision", default="float32", choices=list(precisions), help="Genauigkeit der Netzwerkstufe; uint8 ist exakt und braucht am wenigsten Speicher.")
+    batch_parser.add_argument("--memory-budget", type=int, help="Gekachelte Verarbeitung mit diesem Speicherbudget in Bytes.")
+    batch_parser.add_argument("--scratch-dir", help="Quelle und Karten in Scratch-Dateien in diesem Ordner auslagern (für 4K/8K).")
+    batch_parser.add_argument("--format", default="png", choices=list(output_formats))
+    batch_parser.add_argument("--png-compression", type=int, default=1, choices=range(10))
+    batch_parser.add_argument("--seed", type=int)
+    batch_parser.add_argument("--profile", action="store_true", help="Pro Job eine JSON-Zeile mit Laufzeit, CPU-Zeit und Speicher je Stufe ausgeben.")
+    batch_parser.add_argument("--strength", type=float, default=5)
+    batch_parser.add_argument("--scale", type=float, default=1.0)
+    batch_parser.add_argument("--invert-specular", action="store_true")
+    batch_parser.add_argument("--blur-radius", type=int, default=5)
+    batch_parser.add_argument("--metallic-intensity", type=float, default=1.0)
+    batch_parser.add_argument("--emission-intensity", type=float, default=1.0)
+    batch_parser.add_argument("--opacity-threshold", type=int, default=128)
+    batch_parser.add_argument("--invert-roughness", action="store_true")
+    return parser
+
+def main(argv=None):
+    """
+    Entry point: launches the UI or runs a headless batch.
+
+    Args:
+        argv (list, optional): The command line arguments. Defaults to ``sys.argv[1:]``.
+
+    Returns:
+        int: The exit code.
+    """
+    args = build_parser().parse_args(argv)
+    if getattr(args, "profile", False):
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.command == "batch":
+        return run_batch(args)
+    build_demo().launch(share=getattr(args, "share", True))
+    return 0
 
 if __name__ == "__main__":
-    demo.launch(share=True)
+    sys.exit(main())